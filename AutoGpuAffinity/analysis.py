@@ -0,0 +1,235 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from bootstrap import BlockSketches, bootstrap_intervals
+from compute_frametimes import compute_metrics, latency_metrics
+from frametime_cache import cache_frametimes, load_frametimes, load_metrics, store_metrics
+from presentmon import (
+    FRAMETIME_COLUMN,
+    LATENCY_COLUMNS,
+    capture_columns,
+    concatenate_csvs,
+    iter_columns,
+    latency_values,
+    read_capture,
+    read_frametimes,
+    valid_frametimes,
+)
+from sketch import FrametimeSketch
+from timeline import rolling_metrics, stutter_summary
+
+# latency metrics are prefixed with the name of the latency e.g. render_percentile99
+LATENCY_PREFIXES = tuple(f"{name}_" for name in LATENCY_COLUMNS)
+
+
+def list_cpus(csv_directory: str) -> list[int]:
+    # ignore cache sidecars and any other files in the directory
+    return sorted(
+        int(file[4:-4]) for file in os.listdir(csv_directory) if file.startswith("CPU-") and file.endswith(".csv")
+    )
+
+
+def search_finalists(session_directory: str) -> list[int] | None:
+    # cpus that reached the final round of a search, None if the session did not use search mode
+    search_directory = os.path.join(session_directory, "rounds")
+
+    if not os.path.isdir(search_directory):
+        return None
+
+    indexes = [int(name) for name in os.listdir(search_directory) if name.isdigit()]
+    return list_cpus(os.path.join(search_directory, str(max(indexes)))) if indexes else None
+
+
+def prefix_metrics(name: str, metrics: dict[str, float]) -> dict[str, float]:
+    return {f"{name}_{metric}": value for metric, value in metrics.items()}
+
+
+def analyze_csv(
+    csv_path: str,
+    use_cache: bool = False,
+    relative_accuracy: float | None = None,
+    resamples: int = 0,
+    confidence: float = 0.95,
+    latencies: tuple[str, ...] = (),
+) -> tuple[dict[str, float], dict[str, tuple[float, float]]]:
+    # latencies are the names of the latencies to add metrics of, the latency columns are parsed in the same read as
+    # the frametimes
+    blocks: BlockSketches | None = None
+    frametimes: npt.NDArray[np.float64] | None = None
+
+    if relative_accuracy is not None:
+        # streaming mode, memory does not grow with the length of the capture unless intervals are estimated
+        sketch = FrametimeSketch(relative_accuracy)
+        latency_sketches: dict[str, FrametimeSketch] = {}
+
+        if resamples > 0:
+            blocks = BlockSketches(relative_accuracy=relative_accuracy)
+
+        for chunk in iter_columns(csv_path, capture_columns(bool(latencies))):
+            chunk_frametimes = valid_frametimes(chunk[FRAMETIME_COLUMN])
+            sketch.update(chunk_frametimes)
+
+            if blocks is not None:
+                blocks.update(chunk_frametimes)
+
+            for name, values in latency_values(chunk).items():
+                if name in latencies:
+                    latency_sketches.setdefault(name, FrametimeSketch(relative_accuracy)).update(values)
+
+        metrics = sketch.metrics()
+
+        for name, latency_sketch in latency_sketches.items():
+            if latency_sketch.length > 0:
+                metrics.update(prefix_metrics(name, latency_sketch.latency_metrics()))
+    elif not use_cache or (metrics := load_metrics(csv_path, bool(latencies))) is None:
+        # metrics of every latency are computed so that the cache does not depend on the requested latencies
+        capture_latencies: dict[str, npt.NDArray[np.float64]] = {}
+
+        if latencies:
+            frametimes, capture_latencies = read_capture(csv_path)
+            if use_cache:
+                cache_frametimes(csv_path, frametimes)
+        else:
+            frametimes = load_frametimes(csv_path) if use_cache else read_frametimes(csv_path)
+
+        metrics = compute_metrics(frametimes)
+
+        for name, values in capture_latencies.items():
+            if len(values) > 0:
+                metrics.update(prefix_metrics(name, latency_metrics(values)))
+
+        if use_cache:
+            store_metrics(csv_path, metrics, bool(latencies))
+
+    intervals: dict[str, tuple[float, float]] = {}
+
+    if resamples > 0:
+        if blocks is None:
+            if frametimes is None:
+                frametimes = load_frametimes(csv_path) if use_cache else read_frametimes(csv_path)
+
+            blocks = BlockSketches()
+            blocks.update(frametimes)
+
+        intervals = bootstrap_intervals(blocks, resamples, confidence)
+
+    # negate positive value so that highest negative value will be the lowest absolute value
+    metrics["stdev"] = -metrics["stdev"]
+    # the same applies to latencies, metrics of latencies that were not requested are removed
+    requested_prefixes = tuple(f"{name}_" for name in latencies)
+    metrics = {
+        metric: -value if metric.startswith(LATENCY_PREFIXES) else value
+        for metric, value in metrics.items()
+        if not metric.startswith(LATENCY_PREFIXES) or metric.startswith(requested_prefixes)
+    }
+    if "stdev" in intervals:
+        intervals["stdev"] = (-intervals["stdev"][1], -intervals["stdev"][0])
+
+    return (
+        {metric: round(value, 2) for metric, value in metrics.items()},
+        {metric: (round(lower, 2), round(upper, 2)) for metric, (lower, upper) in intervals.items()},
+    )
+
+
+def analyze_cpus(
+    csv_directory: str,
+    cpus: list[int],
+    workers: int = 1,
+    use_cache: bool = False,
+    relative_accuracy: float | None = None,
+    resamples: int = 0,
+    confidence: float = 0.95,
+    latencies: tuple[str, ...] = (),
+) -> tuple[dict[str, dict[str, float]], dict[str, dict[str, tuple[float, float]]]]:
+    csv_paths = [os.path.join(csv_directory, f"CPU-{cpu}.csv") for cpu in cpus]
+    analyze = partial(
+        analyze_csv,
+        use_cache=use_cache,
+        relative_accuracy=relative_accuracy,
+        resamples=resamples,
+        confidence=confidence,
+        latencies=latencies,
+    )
+
+    if workers > 1 and len(csv_paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(csv_paths))) as executor:
+            # map yields in submission order so results are merged in the same order regardless of which worker finishes first
+            cpu_results = list(executor.map(analyze, csv_paths))
+    else:
+        cpu_results = [analyze(csv_path) for csv_path in csv_paths]
+
+    results = {str(cpu): metrics for cpu, (metrics, _) in zip(cpus, cpu_results)}
+    intervals = {str(cpu): cpu_intervals for cpu, (_, cpu_intervals) in zip(cpus, cpu_results)}
+
+    return results, intervals
+
+
+def merge_rounds(round_paths: list[str], destination_directory: str) -> None:
+    # writes the CSV of each cpu from the captures of every round so that the pooled metrics are computed from the
+    # frames of all rounds
+    for cpu in sorted({cpu for round_path in round_paths for cpu in list_cpus(round_path)}):
+        source_paths = [
+            path for round_path in round_paths if os.path.exists(path := os.path.join(round_path, f"CPU-{cpu}.csv"))
+        ]
+        concatenate_csvs(source_paths, os.path.join(destination_directory, f"CPU-{cpu}.csv"))
+
+
+def round_deviations(
+    round_results: list[dict[str, dict[str, float]]],
+) -> dict[str, dict[str, float]]:
+    # standard deviation of each metric between rounds for each cpu that was benchmarked in more than one round
+    deviations: dict[str, dict[str, float]] = {}
+
+    for cpu in dict.fromkeys(cpu for results in round_results for cpu in results):
+        cpu_rounds = [results[cpu] for results in round_results if cpu in results]
+
+        if len(cpu_rounds) < 2:
+            continue
+
+        deviations[cpu] = {
+            metric: round(float(np.std([abs(results[metric]) for results in cpu_rounds], ddof=1)), 2)
+            for metric in cpu_rounds[0]
+            if all(metric in results for results in cpu_rounds)
+        }
+
+    return deviations
+
+
+def analyze_timeline(
+    csv_path: str,
+    use_cache: bool = False,
+    window: float = 1.0,
+    stutter_factor: float = 2.5,
+) -> dict[str, Any]:
+    frametimes = load_frametimes(csv_path) if use_cache else read_frametimes(csv_path)
+    timeline = rolling_metrics(frametimes, window, stutter_factor=stutter_factor)
+
+    return {
+        **stutter_summary(timeline, float(np.sum(frametimes)) / 1000),
+        "window": window,
+        **{name: np.round(values, 2).tolist() for name, values in timeline.items()},
+    }
+
+
+def analyze_timelines(
+    csv_directory: str,
+    cpus: list[int],
+    workers: int = 1,
+    use_cache: bool = False,
+    window: float = 1.0,
+    stutter_factor: float = 2.5,
+) -> dict[str, dict[str, Any]]:
+    csv_paths = [os.path.join(csv_directory, f"CPU-{cpu}.csv") for cpu in cpus]
+    analyze = partial(analyze_timeline, use_cache=use_cache, window=window, stutter_factor=stutter_factor)
+
+    if workers > 1 and len(csv_paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(csv_paths))) as executor:
+            timelines = list(executor.map(analyze, csv_paths))
+    else:
+        timelines = [analyze(csv_path) for csv_path in csv_paths]
+
+    return {str(cpu): timeline for cpu, timeline in zip(cpus, timelines)}
@@ -0,0 +1,46 @@
+from typing import Protocol
+
+from readiness import Clock
+
+# interface between the orchestration of a session and the system that is benchmarked
+#
+# WindowsBackend in main.py drives the registry, restart64, the subject, PresentMon and xperf while
+# SimulatedBackend in simulation.py produces frametimes on a simulated clock so that sessions can be run on any OS
+
+
+class Capture(Protocol):
+    # a frametime capture that writes a PresentMon CSV while it is running
+
+    def running(self) -> bool: ...
+
+    def wait(self) -> None: ...
+
+    def stop(self) -> None: ...
+
+
+class Backend(Protocol):
+    clock: Clock
+
+    def apply_affinity(self, cpu: int) -> None: ...
+
+    def reset_affinity(self) -> None: ...
+
+    def driver_ready(self) -> bool: ...
+
+    def load_profile(self, profile: int) -> None: ...
+
+    def launch_subject(self, cpu: int | None) -> None: ...
+
+    def subject_ready(self) -> bool: ...
+
+    def start_capture(self, csv_path: str, duration: float) -> Capture: ...
+
+    def start_trace(self) -> None: ...
+
+    def stop_trace(self, etl_path: str) -> None: ...
+
+    def generate_report(self, etl_path: str, report_path: str, save_etl: bool) -> None: ...
+
+    # kills the subject and PresentMon, must not kill xperf as the reports of previous CPUs may still be generating in
+    # the background
+    def kill_processes(self) -> None: ...
@@ -0,0 +1,134 @@
+import numpy as np
+import numpy.typing as npt
+from compute_frametimes import METRIC_VALUES
+from sketch import FrametimeSketch
+
+# neighbouring frames are correlated (e.g. a background task slows every frame for a while) so resampling frames
+# independently underestimates the variability of a capture. instead the capture is split into consecutive blocks of
+# block_duration seconds and each resample draws whole blocks with replacement (block bootstrap), the same reasoning
+# as the batch means of convergence.py
+#
+# each block is held in a sketch so that a resample is the sum of the bucket counts of its blocks and the cost of a
+# resample depends on the number of blocks and occupied buckets rather than the number of frames
+
+
+class BlockSketches:
+    # sketches of consecutive blocks of a capture in order of time, frames are assigned to a block by their start time
+    def __init__(self, block_duration: float = 1.0, relative_accuracy: float = 0.001) -> None:
+        self.block_duration_ms = block_duration * 1000
+        self.relative_accuracy = relative_accuracy
+        self.sketches: list[FrametimeSketch] = []
+        self.elapsed_ms = 0.0
+
+    def update(self, frametimes: npt.ArrayLike) -> None:
+        frametimes = np.asarray(frametimes, dtype=np.float64)
+        if len(frametimes) == 0:
+            return
+
+        starts = self.elapsed_ms + np.cumsum(frametimes) - frametimes
+        blocks = (starts // self.block_duration_ms).astype(np.intp)
+        self.elapsed_ms += float(frametimes.sum())
+
+        boundaries = np.flatnonzero(np.diff(blocks)) + 1
+
+        for block, chunk in zip(blocks[np.r_[0, boundaries]], np.split(frametimes, boundaries)):
+            # a frame longer than a block leaves empty blocks which are ignored
+            while len(self.sketches) <= block:
+                self.sketches.append(FrametimeSketch(self.relative_accuracy))
+
+            self.sketches[block].update(chunk)
+
+
+def resampled_metrics(
+    counts: npt.NDArray[np.float64],
+    frametimes: npt.NDArray[np.float64],
+    metric_values: tuple[float, ...],
+) -> dict[str, npt.NDArray[np.float64]]:
+    # counts is a (resamples, buckets) matrix and frametimes holds the ascending frametime of each bucket
+    # the number of frames differs between resamples as blocks differ in the number of frames
+    lengths = counts.sum(axis=1)
+    weighted = counts * frametimes
+    totals = weighted.sum(axis=1)
+    mean = 1000 * lengths / totals
+
+    fps = 1000 / frametimes
+    squared_deviations = (counts * (fps - mean[:, None]) ** 2).sum(axis=1)
+
+    occupied = counts > 0
+    first = occupied.argmax(axis=1)
+    last = counts.shape[1] - 1 - occupied[:, ::-1].argmax(axis=1)
+
+    # cumulative values from the slowest frametime
+    descending_counts = np.cumsum(counts[:, ::-1], axis=1)
+    descending_sums = np.cumsum(weighted[:, ::-1], axis=1)
+    last_index = counts.shape[1] - 1
+
+    metrics = {
+        "maximum": 1000 / frametimes[first],
+        "average": mean,
+        "minimum": 1000 / frametimes[last],
+        "stdev": np.sqrt(squared_deviations / np.maximum(lengths - 1, 1)),
+    }
+
+    for value in metric_values:
+        ranks = np.ceil(value / 100 * lengths)
+        positions = (descending_counts < ranks[:, None]).sum(axis=1)
+        metrics[f"percentile{value}"] = 1000 / frametimes[last_index - np.minimum(positions, last_index)]
+
+        thresholds = value / 100 * totals
+        positions = (descending_sums < thresholds[:, None]).sum(axis=1)
+        metrics[f"lows{value}"] = 1000 / frametimes[last_index - np.minimum(positions, last_index)]
+
+    return metrics
+
+
+def bootstrap_intervals(
+    blocks: BlockSketches,
+    resamples: int = 1000,
+    confidence: float = 0.95,
+    metric_values: tuple[float, ...] = METRIC_VALUES,
+    batch_size: int = 250,
+    seed: int = 0,
+) -> dict[str, tuple[float, float]]:
+    # returns no intervals if the capture is too short to resample blocks
+    sketches = [sketch for sketch in blocks.sketches if len(sketch.counts) > 0]
+
+    if len(sketches) < 2:
+        return {}
+
+    # bucket counts and sums of each block aligned to the same buckets
+    offset = min(sketch.offset for sketch in sketches)
+    num_buckets = max(sketch.offset + len(sketch.counts) for sketch in sketches) - offset
+    block_counts = np.zeros((len(sketches), num_buckets), dtype=np.float64)
+    block_sums = np.zeros((len(sketches), num_buckets), dtype=np.float64)
+
+    for index, sketch in enumerate(sketches):
+        start = sketch.offset - offset
+        block_counts[index, start : start + len(sketch.counts)] = sketch.counts
+        block_sums[index, start : start + len(sketch.sums)] = sketch.sums
+
+    occupied = block_counts.sum(axis=0) > 0
+    block_counts = block_counts[:, occupied]
+    # mean frametime of each bucket is more accurate than the representative value
+    frametimes = block_sums[:, occupied].sum(axis=0) / block_counts.sum(axis=0)
+
+    # a fixed seed keeps the intervals and therefore the ranking reproducible
+    rng = np.random.default_rng(seed)
+    samples: dict[str, list[npt.NDArray[np.float64]]] = {}
+    num_blocks = len(sketches)
+
+    for start in range(0, resamples, batch_size):
+        # number of times that each block is drawn in each resample
+        size = min(batch_size, resamples - start)
+        draws = rng.multinomial(num_blocks, np.full(num_blocks, 1 / num_blocks), size=size)
+        counts = draws @ block_counts
+
+        for metric, values in resampled_metrics(counts, frametimes, metric_values).items():
+            samples.setdefault(metric, []).append(values)
+
+    alpha = (1 - confidence) / 2
+
+    return {
+        metric: (float(np.quantile(values, alpha)), float(np.quantile(values, 1 - alpha)))
+        for metric, values in ((metric, np.concatenate(batches)) for metric, batches in samples.items())
+    }
@@ -1,36 +1,95 @@
-import math
+import numpy as np
+import numpy.typing as npt
 
+# values used for both the percentile and lows metrics
+METRIC_VALUES: tuple[float, ...] = (1, 0.1, 0.01, 0.005)
 
-class Fps:
-    def __init__(self, frametimes: list[float]) -> None:
-        self.sorted_frametimes = sorted(frametimes, reverse=True)
+# percentiles of the latency metrics, higher latencies are worse so these are the worst cases
+LATENCY_PERCENTILES: tuple[float, ...] = (99, 99.9)
 
-        # cache values
-        self.total = sum(frametimes)
-        self.length = len(frametimes)
-        self.mean = 1000 / (self.total / self.length)
+# keys of compute_metrics
+METRIC_NAMES: tuple[str, ...] = (
+    "maximum",
+    "average",
+    "minimum",
+    "stdev",
+    "duration",
+    *(f"percentile{value}" for value in METRIC_VALUES),
+    *(f"lows{value}" for value in METRIC_VALUES),
+)
 
-    def lows(self, value: float) -> float:
-        current_total = 0.0
 
-        for frametime in self.sorted_frametimes:
-            current_total += frametime
-            if current_total >= value / 100 * self.total:
-                return 1000 / frametime
-        return 0.0
+def sort_frametimes(frametimes: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    # descending order so that the slowest frames come first
+    return np.sort(np.asarray(frametimes, dtype=np.float64))[::-1]
 
-    def percentile(self, value: float) -> float:
-        return 1000 / self.sorted_frametimes[math.ceil(value / 100 * self.length) - 1]
 
-    def stdev(self) -> float:
-        squared_deviations = sum((1000 / framerate - self.mean) ** 2 for framerate in self.sorted_frametimes)
-        return math.sqrt(squared_deviations / (self.length - 1))  # bessel's correction
+def percentiles(sorted_frametimes: npt.NDArray[np.float64], values: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    indices = np.ceil(np.asarray(values, dtype=np.float64) / 100 * len(sorted_frametimes)).astype(np.intp) - 1
+    return 1000 / sorted_frametimes[indices]
 
-    def maximum(self) -> float:
-        return 1000 / self.sorted_frametimes[-1]
 
-    def minimum(self) -> float:
-        return 1000 / self.sorted_frametimes[0]
+def lows(
+    sorted_frametimes: npt.NDArray[np.float64],
+    values: npt.ArrayLike,
+    cumulative: npt.NDArray[np.float64] | None = None,
+) -> npt.NDArray[np.float64]:
+    if cumulative is None:
+        cumulative = np.cumsum(sorted_frametimes)
 
-    def average(self) -> float:
-        return self.mean
+    total = cumulative[-1]
+    thresholds = np.asarray(values, dtype=np.float64) / 100 * total
+
+    # index of the first frame where the running total reaches the threshold
+    indices = np.searchsorted(cumulative, thresholds, side="left")
+    found = indices < len(sorted_frametimes)
+
+    results = np.zeros(len(indices), dtype=np.float64)
+    results[found] = 1000 / sorted_frametimes[indices[found]]
+    return results
+
+
+def compute_metrics(
+    frametimes: npt.ArrayLike,
+    metric_values: tuple[float, ...] = METRIC_VALUES,
+) -> dict[str, float]:
+    sorted_frametimes = sort_frametimes(frametimes)
+    length = len(sorted_frametimes)
+
+    # a single cumulative sum is shared by the mean and all lows thresholds
+    cumulative = np.cumsum(sorted_frametimes)
+    mean = 1000 / (cumulative[-1] / length)
+
+    # bessel's correction
+    stdev = float(np.sqrt(np.sum((1000 / sorted_frametimes - mean) ** 2) / (length - 1))) if length > 1 else 0.0
+
+    return {
+        "maximum": float(1000 / sorted_frametimes[-1]),
+        "average": float(mean),
+        "minimum": float(1000 / sorted_frametimes[0]),
+        "stdev": stdev,
+        # length of the capture in seconds
+        "duration": float(cumulative[-1] / 1000),
+        **{
+            f"percentile{value}": float(result)
+            for value, result in zip(metric_values, percentiles(sorted_frametimes, metric_values))
+        },
+        **{
+            f"lows{value}": float(result)
+            for value, result in zip(metric_values, lows(sorted_frametimes, metric_values, cumulative))
+        },
+    }
+
+
+def latency_metrics(latencies: npt.ArrayLike) -> dict[str, float]:
+    values = np.asarray(latencies, dtype=np.float64)
+
+    # nearest rank in ascending order, partitioning is linear unlike sorting
+    ranks = np.ceil(np.asarray(LATENCY_PERCENTILES) / 100 * len(values)).astype(np.intp) - 1
+    partitioned = np.partition(values, ranks)
+
+    return {
+        "average": float(np.mean(values)),
+        **{f"percentile{value}": float(partitioned[rank]) for value, rank in zip(LATENCY_PERCENTILES, ranks)},
+        "maximum": float(np.max(values)),
+    }
@@ -0,0 +1,115 @@
+import math
+import time
+from collections.abc import Callable, Iterable
+
+import numpy as np
+import numpy.typing as npt
+from compute_frametimes import compute_metrics
+from presentmon import FRAMETIME_COLUMN, CsvTail, valid_frametimes
+
+# z-score of a two-sided 95% confidence interval
+CONFIDENCE_Z = 1.96
+
+
+class ConvergenceMonitor:
+    # the capture is split into consecutive batches of batch_duration seconds and each key metric is computed per
+    # batch. the confidence interval of a metric is derived from the spread of its batch values (batch means method)
+    # which accounts for the correlation between neighbouring frames
+
+    def __init__(self, metrics: Iterable[str] = ("average", "lows1"), batch_duration: float = 1.0) -> None:
+        self.metrics = tuple(metrics)
+        self.batch_duration_ms = batch_duration * 1000
+        self.batch_values: dict[str, list[float]] = {metric: [] for metric in self.metrics}
+        self.pending = np.empty(0, dtype=np.float64)
+        self.elapsed_ms = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return self.elapsed_ms / 1000
+
+    def update(self, frametimes: npt.NDArray[np.float64]) -> None:
+        if len(frametimes) == 0:
+            return
+
+        self.elapsed_ms += float(frametimes.sum())
+        self.pending = np.concatenate((self.pending, frametimes))
+
+        # close every batch that is complete
+        boundaries = np.searchsorted(
+            np.cumsum(self.pending),
+            np.arange(1, int(self.pending.sum() // self.batch_duration_ms) + 1) * self.batch_duration_ms,
+            side="left",
+        )
+
+        start = 0
+        for boundary in boundaries:
+            batch = self.pending[start : boundary + 1]
+            start = boundary + 1
+
+            if len(batch) < 2:
+                continue
+
+            batch_metrics = compute_metrics(batch)
+            for metric in self.metrics:
+                self.batch_values[metric].append(batch_metrics[metric])
+
+        self.pending = self.pending[start:]
+
+    def interval(self, metric: str) -> tuple[float, float]:
+        # returns the mean and half-width of the confidence interval
+        values = self.batch_values[metric]
+
+        if len(values) < 2:
+            return math.nan, math.inf
+
+        return float(np.mean(values)), CONFIDENCE_Z * float(np.std(values, ddof=1)) / math.sqrt(len(values))
+
+    def converged(self, tolerance: float) -> bool:
+        # tolerance is the maximum half-width of each interval relative to its mean
+        for metric in self.metrics:
+            mean, half_width = self.interval(metric)
+            if not half_width <= tolerance * abs(mean):
+                return False
+
+        return True
+
+
+def wait_for_convergence(
+    csv_path: str,
+    is_running: Callable[[], bool],
+    min_duration: float,
+    max_duration: float,
+    tolerance: float,
+    metrics: Iterable[str] = ("average", "lows1"),
+    poll_interval: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+    skip_duration: float = 0.0,
+) -> float:
+    # tails the CSV that is being written until the key metrics converge, max_duration elapses or the writer exits
+    # durations are measured from the frametimes rather than the wall clock and the captured duration is returned
+    # the first skip_duration seconds of frames (e.g. the warm-up) are excluded
+    tail = CsvTail(csv_path)
+    monitor = ConvergenceMonitor(metrics)
+    skip_ms = skip_duration * 1000
+
+    while True:
+        running = is_running()
+        frametimes = valid_frametimes(tail.read().get(FRAMETIME_COLUMN, np.empty(0, dtype=np.float64)))
+
+        if skip_ms > 0:
+            # number of frames that start within the skipped duration
+            num_skipped = int(np.searchsorted(np.cumsum(frametimes) - frametimes, skip_ms, side="left"))
+            skip_ms -= float(frametimes[:num_skipped].sum())
+            frametimes = frametimes[num_skipped:]
+
+        monitor.update(frametimes)
+
+        if not running or monitor.elapsed >= max_duration:
+            break
+
+        if monitor.elapsed >= min_duration and monitor.converged(tolerance):
+            break
+
+        sleep(poll_interval)
+
+    return monitor.elapsed
@@ -0,0 +1,84 @@
+import re
+from typing import Any
+
+# parses the text report generated by xperf -a dpcisr
+#
+# the report has a DPC and an ISR section, each containing a block per module such as
+#
+#   Total = 1234 for module ndis.sys
+#   Elapsed Time, >        0 usecs AND <=        1 usecs,      1000, or  81.04%
+#   Elapsed Time, >        1 usecs AND <=        2 usecs,       234, or  18.96%
+#
+# only the lines above are relied on so unrelated sections and formatting differences between versions are skipped
+
+SECTION_PATTERN = re.compile(r"^\s*(DPC|ISR)s?\b.*\bInfo\b", re.IGNORECASE)
+MODULE_PATTERN = re.compile(r"^\s*Total\s*=\s*(\d+)\s+for module\s+(.+?)\s*$", re.IGNORECASE)
+BUCKET_PATTERN = re.compile(
+    r"^\s*Elapsed Time,\s*>\s*(\d+)\s*usecs\s+AND\s+<=\s*(\d+)\s*usecs,\s*(\d+)",
+    re.IGNORECASE,
+)
+
+
+def parse_report(report_path: str) -> dict[str, dict[str, Any]]:
+    # returns {"dpc": {...}, "isr": {...}} with the count and histogram of each module and of all modules combined
+    report: dict[str, dict[str, Any]] = {
+        kind: {"count": 0, "histogram": {}, "modules": {}} for kind in ("dpc", "isr")
+    }
+
+    kind: str | None = None
+    module: dict[str, Any] | None = None
+
+    with open(report_path, encoding="utf-8", errors="replace") as file:
+        for line in file:
+            if match := SECTION_PATTERN.match(line):
+                kind = match.group(1).lower()
+                module = None
+            elif kind is None:
+                continue
+            elif match := MODULE_PATTERN.match(line):
+                module = {"count": int(match.group(1)), "histogram": {}}
+                report[kind]["modules"][match.group(2)] = module
+                report[kind]["count"] += module["count"]
+            elif module is not None and (match := BUCKET_PATTERN.match(line)):
+                # buckets are keyed by their lower and upper bound in microseconds as the buckets are not contiguous
+                # when empty buckets are omitted
+                bucket, count = (int(match.group(1)), int(match.group(2))), int(match.group(3))
+                module["histogram"][bucket] = module["histogram"].get(bucket, 0) + count
+
+                combined = report[kind]["histogram"]
+                combined[bucket] = combined.get(bucket, 0) + count
+
+    return report
+
+
+def total_time(histogram: dict[tuple[int, int], int]) -> float:
+    # estimated time in milliseconds from the midpoint of each bucket
+    return sum((lower + upper) / 2 * count for (lower, upper), count in histogram.items()) / 1000
+
+
+def latency_percentile(histogram: dict[tuple[int, int], int], value: float) -> float:
+    # upper bound in microseconds of the bucket that contains the percentile
+    total = sum(histogram.values())
+    if total == 0:
+        return 0.0
+
+    cumulative = 0
+    for (_, upper), count in sorted(histogram.items()):
+        cumulative += count
+        if cumulative >= value / 100 * total:
+            return float(upper)
+
+    return float(max(upper for _, upper in histogram))
+
+
+def summarize_report(report_path: str) -> dict[str, float]:
+    report = parse_report(report_path)
+
+    return {
+        "dpc_count": report["dpc"]["count"],
+        "dpc_time": total_time(report["dpc"]["histogram"]),
+        "dpc_latency99": latency_percentile(report["dpc"]["histogram"], 99),
+        "isr_count": report["isr"]["count"],
+        "isr_time": total_time(report["isr"]["histogram"]),
+        "isr_latency99": latency_percentile(report["isr"]["histogram"], 99),
+    }
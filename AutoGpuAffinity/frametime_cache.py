@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from presentmon import read_frametimes
+
+logger = logging.getLogger("CLI")
+
+# bump when the cached data or metrics layout changes so that old caches are rebuilt
+CACHE_VERSION = 3
+
+
+def cache_key(csv_path: str) -> dict[str, int]:
+    stat = os.stat(csv_path)
+    return {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_atomic(path: str, write: Any) -> None:
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        write(file)
+    os.replace(temp_path, path)
+
+
+def read_index(csv_path: str) -> dict[str, Any] | None:
+    try:
+        with open(f"{csv_path}.json", encoding="utf-8") as file:
+            index: dict[str, Any] = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    # the CSV was modified or rewritten since the cache was created
+    if index.get("key") != cache_key(csv_path):
+        return None
+
+    return index
+
+
+def write_index(csv_path: str, index: dict[str, Any]) -> None:
+    write_atomic(f"{csv_path}.json", lambda file: file.write(json.dumps(index).encode("utf-8")))
+
+
+def load_frametimes(csv_path: str) -> npt.NDArray[np.float64]:
+    if read_index(csv_path) is not None and os.path.exists(f"{csv_path}.npy"):
+        # memory-mapped so no data is copied until it is accessed
+        return np.load(f"{csv_path}.npy", mmap_mode="r")
+
+    frametimes = read_frametimes(csv_path)
+    cache_frametimes(csv_path, frametimes)
+
+    return frametimes
+
+
+def cache_frametimes(csv_path: str, frametimes: npt.NDArray[np.float64]) -> None:
+    try:
+        write_atomic(f"{csv_path}.npy", lambda file: np.save(file, frametimes))
+        write_index(csv_path, {"key": cache_key(csv_path)})
+    except OSError as e:
+        # e.g. archived sessions on read-only storage
+        logger.debug("unable to cache frametimes for %s. %s", csv_path, e)
+
+
+def load_metrics(csv_path: str, latency: bool = False) -> dict[str, float] | None:
+    if (index := read_index(csv_path)) is None:
+        return None
+
+    # the cached metrics do not include the latency metrics if the latency columns were not read
+    if latency and not index.get("latency"):
+        return None
+
+    return index.get("metrics")
+
+
+def store_metrics(csv_path: str, metrics: dict[str, float], latency: bool = False) -> None:
+    if (index := read_index(csv_path)) is None:
+        return
+
+    index["metrics"] = metrics
+    index["latency"] = latency
+
+    try:
+        write_index(csv_path, index)
+    except OSError as e:
+        logger.debug("unable to cache metrics for %s. %s", csv_path, e)
@@ -0,0 +1,146 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+from configparser import ConfigParser
+from typing import Any
+
+# append-only journal of a session so that a session that was interrupted (e.g. the graphics driver failed to restart
+# or the system rebooted) can be resumed with --resume rather than started over
+#
+# each line is a JSON object with an event:
+#   start    - the config, the cpus and the search schedule of the session
+#   plan     - the order of the cpus in each round
+#   capture  - the affinity of the graphics driver was changed to benchmark a cpu
+#   complete - the capture of a cpu is complete along with the checksum of its CSV
+#   finish   - every cpu has been benchmarked
+#
+# every line is flushed to disk before the session continues and a truncated final line is ignored
+
+logger = logging.getLogger("CLI")
+
+JOURNAL_NAME = "journal.jsonl"
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def read_journal(session_directory: str) -> list[dict[str, Any]]:
+    entries: list[dict[str, Any]] = []
+
+    try:
+        with open(os.path.join(session_directory, JOURNAL_NAME), encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # the system stopped while the line was being written
+                    logger.debug("ignoring incomplete journal entry: %s", line.strip())
+    except FileNotFoundError:
+        pass
+
+    return entries
+
+
+class SessionJournal:
+    def __init__(self, session_directory: str) -> None:
+        self.session_directory = session_directory
+        self.path = os.path.join(session_directory, JOURNAL_NAME)
+        self.entries = read_journal(session_directory)
+
+        # end a truncated final line so that the next entry is not appended to it
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb+") as file:
+                file.seek(-1, os.SEEK_END)
+
+                if file.read(1) != b"\n":
+                    file.write(b"\n")
+
+    def append(self, event: str, **fields: Any) -> None:
+        entry = {"event": event, "time": datetime.datetime.now().isoformat(timespec="seconds"), **fields}
+
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.entries.append(entry)
+
+    def find(self, event: str) -> dict[str, Any] | None:
+        return next((entry for entry in self.entries if entry["event"] == event), None)
+
+    def start(self, config: ConfigParser, cpus: list[int], search_schedule: list[tuple[int, int]]) -> None:
+        self.append(
+            "start",
+            config={section: dict(config[section]) for section in config.sections()},
+            cpus=cpus,
+            search_schedule=search_schedule,
+        )
+
+    def config(self) -> ConfigParser:
+        # the config of the session so that a resumed session continues with the same settings
+        config = ConfigParser(delimiters="=")
+
+        if (start := self.find("start")) is not None:
+            config.read_dict(start["config"])
+
+        return config
+
+    def plan(self, orders: list[list[int]]) -> list[list[int]]:
+        # returns the planned order of a resumed session, otherwise the order is recorded and returned
+        if (plan := self.find("plan")) is not None:
+            planned_orders: list[list[int]] = plan["orders"]
+            return planned_orders
+
+        self.append("plan", orders=orders)
+        return orders
+
+    def relative_path(self, path: str) -> str:
+        # paths are relative to the session directory so that the session directory can be moved
+        return os.path.relpath(path, self.session_directory)
+
+    def capture(self, cpu: int, csv_path: str) -> None:
+        self.append("capture", cpu=cpu, path=self.relative_path(csv_path))
+
+    def complete(self, cpu: int, csv_path: str, warmup: float | None = None) -> None:
+        self.append(
+            "complete",
+            cpu=cpu,
+            path=self.relative_path(csv_path),
+            sha256=file_checksum(csv_path),
+            **({"warmup": warmup} if warmup is not None else {}),
+        )
+
+    def completed(self, csv_path: str) -> dict[str, Any] | None:
+        # returns the completion entry of a capture if its CSV has not changed since it was completed
+        relative_path = self.relative_path(csv_path)
+        entry = next(
+            (
+                entry
+                for entry in reversed(self.entries)
+                if entry["event"] == "complete" and os.path.normcase(entry["path"]) == os.path.normcase(relative_path)
+            ),
+            None,
+        )
+
+        if entry is None or not os.path.exists(csv_path) or file_checksum(csv_path) != entry["sha256"]:
+            return None
+
+        return entry
+
+    def interrupted(self) -> list[dict[str, Any]]:
+        # captures that were started but not completed
+        completed = {entry["path"] for entry in self.entries if entry["event"] == "complete"}
+        captures = {entry["path"]: entry for entry in self.entries if entry["event"] == "capture"}
+        return [entry for path, entry in captures.items() if path not in completed]
+
+    def finish(self) -> None:
+        self.append("finish")
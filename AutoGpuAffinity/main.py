@@ -4,19 +4,37 @@ import ctypes
 import datetime
 import json
 import logging
+import multiprocessing
 import os
-import shutil
+import platform
 import subprocess
 import sys
 import textwrap
 import time
 import traceback
 import winreg
+from collections.abc import Callable
 from configparser import ConfigParser
 from typing import Any, NoReturn
 
 import wmi
-from compute_frametimes import Fps
+from journal import SessionJournal
+from pipeline import PostProcessor
+from processor_groups import (
+    active_group_sizes,
+    assignment_set_override,
+    available_cpus,
+    cpu_label,
+    launch_affinity,
+    parse_cpu,
+    parse_cpu_array,
+)
+from readiness import SystemClock, wait_until
+from results import display_comparison, display_results, ranked_metrics, store_path
+from search import halving_schedule
+from session import Benchmark, SessionError, run_session, validate_config
+from session_trace import PhaseTracer, measured_capture_overhead, trace_path
+from topology import get_topology, representatives, windows_numa_nodes
 
 logger = logging.getLogger("CLI")
 
@@ -55,10 +73,6 @@ def apply_affinity(hwids: list[str], cpu: int = -1, apply: bool = True) -> None:
     for hwid in hwids:
         policy_path = f"SYSTEM\\ControlSet001\\Enum\\{hwid}\\Device Parameters\\Interrupt Management\\Affinity Policy"
         if apply and cpu > -1:
-            decimal_affinity = 1 << cpu
-            bin_affinity = bin(decimal_affinity).lstrip("0b")
-            le_hex = int(bin_affinity, 2).to_bytes(8, "little").rstrip(b"\x00")
-
             with winreg.CreateKey(winreg.HKEY_LOCAL_MACHINE, policy_path) as key:
                 winreg.SetValueEx(key, "DevicePolicy", 0, winreg.REG_DWORD, 4)
                 winreg.SetValueEx(
@@ -66,7 +80,7 @@ def apply_affinity(hwids: list[str], cpu: int = -1, apply: bool = True) -> None:
                     "AssignmentSetOverride",
                     0,
                     winreg.REG_BINARY,
-                    le_hex,
+                    assignment_set_override(cpu),
                 )
 
         else:
@@ -88,158 +102,176 @@ def apply_affinity(hwids: list[str], cpu: int = -1, apply: bool = True) -> None:
     )
 
 
-def start_afterburner(path: str, profile: int) -> None:
+def start_afterburner(path: str, profile: int, timeout: float = 5) -> None:
     with subprocess.Popen([path, f"/Profile{profile}", "/Q"]) as process:
-        time.sleep(5)
+        # afterburner exits once the profile has been applied
+        if wait_until(lambda: process.poll() is not None, timeout) is None:
+            logger.debug("afterburner did not exit after applying profile %d", profile)
+
         process.kill()
 
 
-def print_table(formatted_results: dict[str, dict[str, str]]):
-    # print table headings
-    print(f"{'CPU':<5}", end="")
-
-    for metric in (
-        "Max",
-        "Avg",
-        "Min",
-        "STDEV",
-        "1 %ile",
-        "0.1 %ile",
-        "0.01 %ile",
-        "0.005 %ile",
-        "1% Low",
-        "0.1% Low",
-        "0.01% Low",
-        "0.005% Low",
-    ):
-        print(f"{metric:<12}", end="")
+def gpus_ready(hwids: list[str]) -> Callable[[], bool]:
+    def probe() -> bool:
+        # the device reappears without errors once the driver has restarted
+        devices = {gpu.PnPDeviceID: gpu for gpu in wmi.WMI().Win32_VideoController()}
+        return all(hwid in devices and devices[hwid].ConfigManagerErrorCode == 0 for hwid in hwids)
+
+    return probe
+
 
-    print()  # new line
+def process_ids(image_name: str) -> set[int]:
+    output = subprocess.run(
+        ["tasklist", "/FI", f"IMAGENAME eq {image_name}", "/FO", "CSV", "/NH"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
 
-    # print values for each heading
-    for _cpu, _results in formatted_results.items():
-        print(f"{_cpu:<5}", end="")
-        for metric_value in _results.values():
-            # padding needs to be larger to compensate for color chars
-            right_padding = 21 if "[" in metric_value else 12
-            print(f"{metric_value:<{right_padding}}", end="")
-        print()  # new line
+    # an informational message without commas is printed if there are no matches
+    return {int(row[1]) for row in csv.reader(output.splitlines()) if len(row) > 1}
 
-    print()  # new line
 
+def window_visible(image_name: str) -> Callable[[], bool]:
+    user32 = ctypes.windll.user32
+    enum_windows_proc = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_void_p, ctypes.c_void_p)
 
-def display_results(csv_directory: str, enable_color: bool) -> None:
-    results: dict[str, dict[str, float]] = {}
+    def probe() -> bool:
+        if not (pids := process_ids(image_name)):
+            return False
 
-    # each index represents the rank (e.g. index 0 is 1st)
-    colors: list[str] = [
-        "\x1b[92m",  # Green
-        "\x1b[93m",  # Yellow
-    ]
+        visible = False
 
-    if enable_color:
-        default = "\x1b[0m"
-        os.system("color")
-    else:
-        default = ""
-
-    cpus = sorted([int(file.strip("CPU-.csv")) for file in os.listdir(csv_directory)])
-    num_cpus = len(cpus)
-    # 1 CPUs means no ranking will be done
-    # 2 CPUs means only one metric will be ranked since it's binary
-    # always leave last place unranked
-
-    top_n_values = num_cpus - 1 if num_cpus < 3 else len(colors)
-
-    for cpu in cpus:
-        csv_file = f"CPU-{cpu}.csv"
-
-        frametimes: list[float] = []
-
-        with open(f"{csv_directory}\\{csv_file}", encoding="utf-8") as file:
-            for row in csv.DictReader(file):
-                # convert key names to lowercase because column names changed in a newer version of PresentMon
-                row_lower = {key.lower(): value for key, value in row.items()}
-
-                if (ms_between_presents := row_lower.get("msbetweenpresents")) is not None:
-                    frametimes.append(float(ms_between_presents))
-
-        fps = Fps(frametimes)
-
-        # results of current CPU in results dict
-        results[str(cpu)] = {
-            "maximum": round(fps.maximum(), 2),
-            "average": round(fps.average(), 2),
-            "minimum": round(fps.minimum(), 2),
-            # negate positive value so that highest negative value will be the lowest absolute value
-            "stdev": round(-fps.stdev(), 2),
-            **{
-                f"{metric}{value}": round(getattr(fps, metric)(value), 2)
-                for metric in ("percentile", "lows")
-                for value in (1, 0.1, 0.01, 0.005)
-            },
-        }
-
-    formatted_results: dict[str, dict[str, str]] = {cpu: {} for cpu in results}
-
-    # analyze best values for each metric
-    for metric in (
-        "maximum",
-        "average",
-        "minimum",
-        "stdev",
-        # "percentile1", "percentile0.1" etc
-        *(tuple(f"{metric}{value}" for metric in ("percentile", "lows") for value in (1, 0.1, 0.01, 0.005))),
-    ):
-        # set of all values within the metric
-        values = {_results[metric] for _results in results.values()}
+        def callback(hwnd: int, _: int) -> bool:
+            nonlocal visible
+            pid = ctypes.c_ulong()
+            user32.GetWindowThreadProcessId(ctypes.c_void_p(hwnd), ctypes.byref(pid))
 
-        # create ordered list without duplicates of top n values
-        top_values = list(dict.fromkeys(sorted(values, reverse=True)[:top_n_values]))
+            if pid.value in pids and user32.IsWindowVisible(ctypes.c_void_p(hwnd)):
+                visible = True
+                return False  # stop enumerating
 
-        for _cpu, _results in results.items():
-            metric_value = _results[metric]
+            return True
 
-            # abs is for negative values such as stdev
-            # :.2f is for .00 numerical formatting
-            new_value = f"{abs(metric_value):.2f}"
+        user32.EnumWindows(enum_windows_proc(callback), 0)
+        return visible
 
-            # determine rank of value
-            if enable_color:
-                try:
-                    nth_best = top_values.index(metric_value)
-                    color = colors[nth_best]
-                    new_value = f"{color}{new_value}{default}"
-                except ValueError:
-                    # don't highlight value as top n by leaving it unmodified
-                    pass
+    return probe
 
-            formatted_results[_cpu][metric] = new_value
 
-    os.system("<nul set /p=\x1B[8;50;1000t")
+class WindowsCapture:
+    def __init__(self, presentmon: str, process: subprocess.Popen[bytes]) -> None:
+        self.presentmon = presentmon
+        self.process = process
 
-    print_table(formatted_results)
+    def running(self) -> bool:
+        return self.process.poll() is None
 
+    def wait(self) -> None:
+        if (returncode := self.process.wait()) != 0:
+            raise subprocess.CalledProcessError(returncode, self.process.args)
 
-def parse_array(str_array: str) -> list[int]:
-    # return if empty
-    if str_array == "[]":
-        return []
+    def stop(self) -> None:
+        if self.process.poll() is None:
+            kill_processes(self.presentmon)
 
-    # convert to list[str]
-    # [1:-1] removes brackets
-    split_array = [x.strip() for x in str_array[1:-1].split(",")]
+        self.process.wait()
 
-    parsed_list: list[int] = []
 
-    for item in split_array:
-        if ".." in item:
-            lower, upper = item.split("..")
-            parsed_list.extend(range(int(lower), int(upper) + 1))
-        else:
-            parsed_list.append(int(item))
+class WindowsBackend:
+    def __init__(
+        self,
+        config: ConfigParser,
+        gpu_hwids: list[str],
+        subject_path: str,
+        subject_args: list[str],
+        presentmon: str,
+    ) -> None:
+        self.clock = SystemClock()
+        self.config = config
+        self.gpu_hwids = gpu_hwids
+        self.subject_path = subject_path
+        self.subject_fname = os.path.basename(subject_path)
+        self.subject_args = subject_args
+        self.presentmon = presentmon
+        self.gpus_ready = gpus_ready(gpu_hwids)
+        self.window_visible = window_visible(self.subject_fname)
+        # the subject is launched relative to a NUMA node on systems with more than one processor group
+        self.numa_nodes = windows_numa_nodes()
+
+    def apply_affinity(self, cpu: int) -> None:
+        apply_affinity(self.gpu_hwids, cpu)
+
+    def reset_affinity(self) -> None:
+        apply_affinity(self.gpu_hwids, apply=False)
+
+    def driver_ready(self) -> bool:
+        return self.gpus_ready()
+
+    def load_profile(self, profile: int) -> None:
+        start_afterburner(self.config.get("MSI Afterburner", "location"), profile)
+
+    def launch_subject(self, cpu: int | None) -> None:
+        affinity_args = launch_affinity(cpu, self.numa_nodes) if cpu is not None else []
+
+        subprocess.run(
+            ["start", "", *affinity_args, self.subject_path, *self.subject_args],
+            shell=True,
+            check=True,
+        )
+
+    def subject_ready(self) -> bool:
+        return self.window_visible()
+
+    def start_capture(self, csv_path: str, duration: float) -> WindowsCapture:
+        process = subprocess.Popen(
+            [
+                f"bin\\PresentMon\\{self.presentmon}",
+                "-stop_existing_session",
+                "-no_top",
+                "-timed",
+                str(int(duration)),
+                "-process_name",
+                self.subject_fname,
+                "-output_file",
+                csv_path,
+                "-terminate_after_timed",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        return WindowsCapture(self.presentmon, process)
+
+    def start_trace(self) -> None:
+        subprocess.run(
+            [self.config.get("xperf", "location"), "-on", "base+interrupt+dpc"],
+            check=True,
+        )
+
+    def stop_trace(self, etl_path: str) -> None:
+        subprocess.run(
+            [self.config.get("xperf", "location"), "-d", etl_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+
+    def generate_report(self, etl_path: str, report_path: str, save_etl: bool) -> None:
+        try:
+            subprocess.run(
+                [self.config.get("xperf", "location"), "-quiet", "-i", etl_path, "-o", report_path, "-a", "dpcisr"],
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise SessionError("unable to generate dpcisr report") from e
 
-    return parsed_list
+        if not save_etl:
+            os.remove(etl_path)
+
+    def kill_processes(self) -> None:
+        # xperf is not killed as the reports of previous CPUs may still be generating in the background
+        kill_processes(self.subject_fname, self.presentmon)
 
 
 def main() -> int:
@@ -251,22 +283,10 @@ def main() -> int:
         f"AutoGpuAffinity Version {version} - GPLv3\nGitHub - https://github.com/amitxv\nDonate - https://www.buymeacoffee.com/amitxv\n",
     )
 
-    if not ctypes.windll.shell32.IsUserAnAdmin():
-        logger.error("administrator privileges required")
-        return 1
-
     # cd to directory of the script
     program_path = os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else os.path.dirname(__file__)
     os.chdir(program_path)
 
-    gpu_hwids: list[str] = [gpu.PnPDeviceID for gpu in wmi.WMI().Win32_VideoController()]
-
-    if (cpu_count := os.cpu_count()) is not None:
-        cpu_count -= 1  # os.cpu_count() returns core count not last CPU index
-    else:
-        logger.error("unable to get CPU count")
-        return 1
-
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--version",
@@ -285,20 +305,79 @@ def main() -> int:
         type=str,
         help="analyze csv files from a previous benchmark",
     )
+    parser.add_argument(
+        "--compare",
+        metavar="<session>",
+        type=str,
+        nargs="*",
+        help="rank CPUs by the pooled results of stored sessions (all sessions if none are specified)",
+    )
     parser.add_argument(
         "--apply-affinity",
         metavar="<cpu>",
         type=str,
         help="assign a single core affinity to graphics drivers",
     )
+    parser.add_argument(
+        "--resume",
+        metavar="<session>",
+        type=str,
+        help="continue an interrupted session from the CPUs that have not been benchmarked",
+    )
     args = parser.parse_args()
 
     windows_version_info = sys.getwindowsversion()
 
+    config_path = args.config if args.config is not None else "config.ini"
+
+    # delimiters=("=") is required for file path errors with colons
+    config = ConfigParser(delimiters="=")
+    config.read(config_path)
+
+    journal: SessionJournal | None = None
+
+    if args.resume:
+        journal = SessionJournal(args.resume)
+
+        if journal.find("start") is None:
+            logger.error("no session journal found in %s", args.resume)
+            return 1
+
+        if journal.find("finish") is not None:
+            logger.error("session has already finished")
+            return 1
+
+        # continue with the config that the session was started with
+        config = journal.config()
+
     if args.analyze:
-        display_results(args.analyze, windows_version_info.major >= 10)
+        display_results(args.analyze, windows_version_info.major >= 10, config)
         return 0
 
+    if args.compare is not None:
+        display_comparison(
+            store_path(config),
+            args.compare,
+            windows_version_info.major >= 10,
+            ranked_metrics(config),
+        )
+        return 0
+
+    # analyzing and comparing sessions does not require elevation or enumerating the graphics cards
+    if not ctypes.windll.shell32.IsUserAnAdmin():
+        logger.error("administrator privileges required")
+        return 1
+
+    gpus = wmi.WMI().Win32_VideoController()
+    gpu_hwids: list[str] = [gpu.PnPDeviceID for gpu in gpus]
+
+    # os.cpu_count() does not account for processor groups
+    try:
+        cpus = available_cpus(active_group_sizes())
+    except OSError as e:
+        logger.error("unable to get CPU count. %s", e)
+        return 1
+
     basicdisplay_start = read_value(
         "SYSTEM\\CurrentControlSet\\Services\\BasicDisplay",
         "Start",
@@ -315,19 +394,22 @@ def main() -> int:
         return 1
 
     if args.apply_affinity:
-        requested_affinity = int(args.apply_affinity)
-        if not 0 <= requested_affinity <= cpu_count:
+        try:
+            requested_affinity = parse_cpu(args.apply_affinity)
+        except ValueError:
+            requested_affinity = -1
+
+        if requested_affinity not in cpus:
             logger.error("invalid affinity")
             return 1
 
         apply_affinity(gpu_hwids, requested_affinity)
-        logger.info("set gpu driver affinity to: CPU %d", requested_affinity)
+        logger.info("set gpu driver affinity to: CPU %s", cpu_label(requested_affinity))
         return 0
 
     # use 1.6.0 on Windows Server
     presentmon = f"PresentMon-{'1.10.0' if windows_version_info.major >= 10 and windows_version_info.product_type != 3 else '1.6.0'}-x64.exe"
 
-    config_path = args.config if args.config is not None else "config.ini"
     user32 = ctypes.windll.user32
 
     subject_paths: dict[int, str] = {
@@ -335,10 +417,6 @@ def main() -> int:
         2: "bin\\D3D9-benchmark.exe",
     }
 
-    # delimiters=("=") is required for file path errors with colons
-    config = ConfigParser(delimiters="=")
-    config.read(config_path)
-
     if not gpu_hwids:
         logger.error("no graphics card found")
         return 1
@@ -347,8 +425,10 @@ def main() -> int:
         logger.error("config file not found")
         return 1
 
-    if config.getint("settings", "cache_duration") < 0 or config.getint("settings", "benchmark_duration") <= 0:
-        logger.error("invalid durations specified")
+    try:
+        validate_config(config)
+    except SessionError as e:
+        logger.error(e)
         return 1
 
     if config.getboolean("xperf", "enabled") and not os.path.exists(
@@ -370,25 +450,78 @@ def main() -> int:
     subject_fname = os.path.basename(subject_path)
 
     # can't update config with list, must be a string
-    custom_cpus = parse_array(config.get("settings", "custom_cpus"))
+    try:
+        custom_cpus = parse_cpu_array(config.get("settings", "custom_cpus"))
+    except ValueError as e:
+        logger.error("invalid custom_cpus array. %s", e)
+        return 1
 
     if custom_cpus:
         # remove duplicates and sort
         benchmark_cpus = sorted(set(custom_cpus))
 
-        if not all(0 <= cpu <= cpu_count for cpu in benchmark_cpus):
+        if not all(cpu in cpus for cpu in benchmark_cpus):
             logger.error("invalid cpus in custom_cpus array")
             return 1
     else:
-        benchmark_cpus = list(range(cpu_count + 1))
+        benchmark_cpus = cpus
+
+    # benchmark representatives of groups of CPUs that are expected to behave the same
+    if (topology_mode := config.get("settings", "topology", fallback="none")) != "none":
+        try:
+            benchmark_cpus = representatives(
+                [logical_cpu for logical_cpu in get_topology() if logical_cpu.cpu in benchmark_cpus],
+                topology_mode,
+                config.getint("settings", "representatives", fallback=1),
+            )
+        except (OSError, ValueError) as e:
+            logger.error("unable to prune CPUs by topology. %s", e)
+            return 1
 
     session_directory = f"captures\\AutoGpuAffinity-{time.strftime('%d%m%y%H%M%S')}"
-    estimated_time_seconds = (
-        10
-        + config.getint("settings", "cache_duration")
-        + config.getint("settings", "benchmark_duration")
-        + (5 if config.getint("MSI Afterburner", "profile") > 0 else 0)
-    ) * len(benchmark_cpus)
+
+    if journal is not None:
+        session_directory = args.resume
+        benchmark_cpus = journal.find("start")["cpus"]
+
+    # overhead per capture measured from the traces of previous sessions, otherwise a conservative guess
+    capture_overhead = measured_capture_overhead("captures")
+    if capture_overhead is None:
+        capture_overhead = 10 + (5 if config.getint("MSI Afterburner", "profile") > 0 else 0)
+
+    # the warm-up is at most max_duration when it is detected
+    if config.getboolean("warmup", "enabled", fallback=False):
+        capture_overhead += config.getfloat("warmup", "max_duration", fallback=30)
+    else:
+        capture_overhead += config.getint("settings", "cache_duration")
+
+    # number of CPUs and capture duration of each round
+    search_schedule = [(len(benchmark_cpus), config.getint("settings", "benchmark_duration"))]
+
+    if config.getboolean("search", "enabled", fallback=False):
+        try:
+            search_schedule = halving_schedule(
+                len(benchmark_cpus),
+                config.getint("search", "screening_duration"),
+                config.getint("settings", "benchmark_duration"),
+                config.getint("search", "eta"),
+                config.getint("search", "time_budget") * 60,
+                capture_overhead,
+            )
+        except ValueError as e:
+            logger.error(e)
+            return 1
+
+    # a resumed session continues with the schedule that the session was started with
+    if journal is not None:
+        search_schedule = [(num_cpus, duration) for num_cpus, duration in journal.find("start")["search_schedule"]]
+
+    # every cpu is benchmarked once per round
+    num_rounds = config.getint("rounds", "count", fallback=1)
+
+    estimated_time_seconds = num_rounds * sum(
+        num_cpus * (capture_overhead + duration) for num_cpus, duration in search_schedule
+    )
 
     estimated_time = datetime.timedelta(seconds=estimated_time_seconds)
     finish_time = datetime.datetime.now() + estimated_time
@@ -397,8 +530,9 @@ def main() -> int:
         textwrap.dedent(
             f"""        Session Directory        {session_directory}
         Cache Duration           {config.get("settings", "cache_duration")}
+        Detect Warm-up           {config.getboolean("warmup", "enabled", fallback=False)}
         Benchmark Duration       {config.get("settings", "benchmark_duration")}
-        Benchmark CPUs           {"All" if not custom_cpus else ','.join([str(cpu) for cpu in benchmark_cpus])}
+        Benchmark CPUs           {"All" if not custom_cpus and topology_mode == "none" else ','.join([cpu_label(cpu) for cpu in benchmark_cpus])}
         Subject                  {os.path.splitext(subject_fname)[0]}
         Estimated Time           {estimated_time}
         Estimated End Time       {finish_time.strftime('%H:%M:%S')}
@@ -407,6 +541,11 @@ def main() -> int:
         Save ETLs                {config.getboolean("xperf", "save_etls")}
         Window Mode              {f"Fullscreen ({user32.GetSystemMetrics(0)}x{user32.GetSystemMetrics(1)})" if config.getboolean("liblava", "fullscreen") else f"Windowed ({config.get('liblava', 'x_resolution')}x{config.get('liblava', 'y_resolution')})"}
         Sync Affinity            {config.getboolean("settings", "sync_driver_affinity")}
+        Early Stop               {config.getboolean("early stop", "enabled", fallback=False)}
+        Background Processing    {config.getboolean("settings", "background_processing", fallback=False)}
+        Search Rounds            {" -> ".join(f"{num_cpus}x{duration}s" for num_cpus, duration in search_schedule)}
+        Rounds                   {num_rounds} ({config.get("rounds", "order", fallback="latin")} order)
+        Resume                   {f"{sum(entry['event'] == 'complete' for entry in journal.entries)} captures completed" if journal is not None else False}
         """,
         ),
     )
@@ -429,9 +568,24 @@ def main() -> int:
     # this will create all of the required folders
     os.makedirs(f"{session_directory}\\CSVs", exist_ok=True)
 
+    # metadata for comparing sessions in the results store, a resumed session keeps the metadata of its start
+    if journal is None:
+        with open(f"{session_directory}\\session.json", "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "subject": os.path.splitext(subject_fname)[0],
+                    "driver_version": ",".join(gpu.DriverVersion for gpu in gpus),
+                    "os_version": platform.version(),
+                    "config": {section: dict(config[section]) for section in config.sections()},
+                },
+                file,
+                indent=4,
+            )
+
     # stop any existing trace sessions and processes
     if config.getboolean("xperf", "enabled"):
-        os.mkdir(f"{session_directory}\\xperf")
+        os.makedirs(f"{session_directory}\\xperf", exist_ok=True)
 
         try:
             subprocess.run(
@@ -448,105 +602,48 @@ def main() -> int:
 
     kill_processes("xperf.exe", subject_fname, presentmon)
 
-    for cpu in benchmark_cpus:
-        logger.info("benchmarking CPU %d", cpu)
-
-        apply_affinity(gpu_hwids, cpu)
-        time.sleep(5)
-
-        if (profile := config.getint("MSI Afterburner", "profile")) > 0:
-            start_afterburner(config.get("MSI Afterburner", "location"), profile)
+    # process the reports and CSVs of previous CPUs while the next CPU is being benchmarked
+    post_processor = PostProcessor() if config.getboolean("settings", "background_processing", fallback=False) else None
 
-        affinity_args: list[str] = []
-        if config.getboolean("settings", "sync_driver_affinity"):
-            affinity_args.extend(["/affinity", hex(1 << cpu)])
+    backend = WindowsBackend(config, gpu_hwids, subject_path, subject_args, presentmon)
+    tracer = PhaseTracer()
+    benchmark = Benchmark(config, backend, post_processor, tracer)
 
-        subprocess.run(
-            ["start", "", *affinity_args, subject_path, *subject_args],
-            shell=True,
-            check=True,
-        )
-
-        # 5s offset to allow subject to launch
-        time.sleep(5 + config.getint("settings", "cache_duration"))
-
-        if config.getboolean("xperf", "enabled"):
-            subprocess.run(
-                [config.get("xperf", "location"), "-on", "base+interrupt+dpc"],
-                check=True,
-            )
-
-        subprocess.run(
-            [
-                f"bin\\PresentMon\\{presentmon}",
-                "-stop_existing_session",
-                "-no_top",
-                "-timed",
-                config.get("settings", "benchmark_duration"),
-                "-process_name",
-                subject_fname,
-                "-output_file",
-                f"{session_directory}\\CSVs\\CPU-{cpu}.csv",
-                "-terminate_after_timed",
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=True,
-        )
-
-        if not os.path.exists(f"{session_directory}\\CSVs\\CPU-{cpu}.csv"):
-            logger.error(
-                "csv log unsuccessful, this may be due to a missing dependency or windows component",
-            )
-            shutil.rmtree(session_directory)
-            apply_affinity(gpu_hwids, apply=False)
-            return 1
-
-        if config.getboolean("xperf", "enabled"):
-            subprocess.run(
-                [
-                    config.get("xperf", "location"),
-                    "-d",
-                    f"{session_directory}\\xperf\\CPU-{cpu}.etl",
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True,
-            )
+    if journal is None:
+        journal = SessionJournal(session_directory)
+        journal.start(config, benchmark_cpus, search_schedule)
+    else:
+        for entry in journal.interrupted():
+            logger.info("CPU %s was interrupted and will be benchmarked again", cpu_label(entry["cpu"]))
 
-            try:
-                subprocess.run(
-                    [
-                        config.get("xperf", "location"),
-                        "-quiet",
-                        "-i",
-                        f"{session_directory}\\xperf\\CPU-{cpu}.etl",
-                        "-o",
-                        f"{session_directory}\\xperf\\CPU-{cpu}.txt",
-                        "-a",
-                        "dpcisr",
-                    ],
-                    check=True,
-                )
-            except subprocess.CalledProcessError:
-                logger.error("unable to generate dpcisr report")
-                shutil.rmtree(session_directory)
-                apply_affinity(gpu_hwids, apply=False)
-                return 1
+        # the affinity policy of the interrupted CPU may still be applied
+        backend.reset_affinity()
 
-            if not config.getboolean("xperf", "save_etls"):
-                os.remove(f"{session_directory}\\xperf\\CPU-{cpu}.etl")
+    try:
+        run_session(config, benchmark, session_directory, benchmark_cpus, search_schedule, journal)
+    except SessionError as e:
+        logger.error(e)
+        return 1
+    finally:
+        # reset however the session ended, including errors raised by background tasks
+        backend.reset_affinity()
 
-        kill_processes("xperf.exe", subject_fname, presentmon)
+        # the captures are kept so that the session can be resumed
+        if journal.find("finish") is None:
+            logger.info("resume the session with --resume %s", session_directory)
 
-    # cleanup
-    apply_affinity(gpu_hwids, apply=False)
+        # the trace is written however the session ended so that the phases that led to an error can be inspected
+        try:
+            tracer.write(trace_path(session_directory))
+        except OSError as e:
+            logger.warning("unable to write the trace. %s", e)
 
     if os.path.exists("C:\\kernel.etl"):
         os.remove("C:\\kernel.etl")
 
     print()
-    display_results(f"{session_directory}\\CSVs", windows_version_info.major >= 10)
+    tracer.print_summary()
+    display_results(f"{session_directory}\\CSVs", windows_version_info.major >= 10, config)
 
     return 0
 
@@ -572,4 +669,6 @@ def entry_point() -> NoReturn:
 
 
 if __name__ == "__main__":
+    # required for the analysis process pool in a frozen executable
+    multiprocessing.freeze_support()
     entry_point()
@@ -0,0 +1,44 @@
+import queue
+import threading
+from collections.abc import Callable
+
+
+class PostProcessor:
+    # runs post-processing tasks of previous CPUs (e.g. report generation) in a background thread while the next CPU
+    # is being benchmarked. submit blocks once max_pending tasks are queued so that the backlog can not grow without
+    # bound and the first exception raised by a task is re-raised in the submitting thread
+
+    def __init__(self, max_pending: int = 2) -> None:
+        self.tasks: queue.Queue[Callable[[], object] | None] = queue.Queue(maxsize=max_pending)
+        self.error: Exception | None = None
+        self.thread = threading.Thread(target=self._worker, name="PostProcessor", daemon=True)
+        self.thread.start()
+
+    def _worker(self) -> None:
+        while (task := self.tasks.get()) is not None:
+            # skip the remaining tasks once one has failed as the session will be aborted
+            if self.error is None:
+                try:
+                    task()
+                except Exception as e:
+                    self.error = e
+
+            self.tasks.task_done()
+
+        self.tasks.task_done()
+
+    def raise_if_failed(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def submit(self, task: Callable[[], object]) -> None:
+        self.raise_if_failed()
+        self.tasks.put(task)
+
+    def close(self) -> None:
+        # waits for all queued tasks to complete
+        if self.thread.is_alive():
+            self.tasks.put(None)
+            self.thread.join()
+
+        self.raise_if_failed()
@@ -0,0 +1,213 @@
+import csv
+import shutil
+from array import array
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+import numpy.typing as npt
+
+# column names are compared in lowercase because they changed in a newer version of PresentMon
+# e.g. MsBetweenPresents (1.6.0) and msBetweenPresents (1.10.0)
+FRAMETIME_COLUMN = "msbetweenpresents"
+
+# columns of each latency in order of preference, newer versions of PresentMon report the render latency as
+# MsRenderPresentLatency
+LATENCY_COLUMNS: dict[str, tuple[str, ...]] = {
+    "present_api": ("msinpresentapi",),
+    "render": ("msuntilrendercomplete", "msrenderpresentlatency"),
+    "display": ("msuntildisplayed",),
+}
+
+
+def complete_lines(lines: Iterable[str]) -> Iterator[str]:
+    # PresentMon may be terminated mid-write which leaves a truncated final row without a line ending
+    for line in lines:
+        if line.endswith("\n"):
+            yield line
+
+
+def project_rows(
+    rows: Iterator[list[str]],
+    indexes: dict[str, int],
+    max_rows: int | None = None,
+) -> dict[str, npt.NDArray[np.float64]]:
+    values: dict[str, array[float]] = {column: array("d") for column in indexes}
+    projection = list(indexes.items())
+    min_length = max(indexes.values(), default=-1) + 1
+    num_rows = 0
+
+    for row in rows:
+        if len(row) < min_length:
+            continue
+
+        for column, index in projection:
+            try:
+                values[column].append(float(row[index]))
+            except ValueError:
+                # e.g. NA for frames that were never displayed
+                values[column].append(np.nan)
+
+        num_rows += 1
+        if num_rows == max_rows:
+            break
+
+    return {column: np.frombuffer(column_values, dtype=np.float64) for column, column_values in values.items()}
+
+
+def iter_columns(
+    csv_path: str,
+    columns: Iterable[str] = (FRAMETIME_COLUMN,),
+    chunk_size: int = 65536,
+) -> Iterator[dict[str, npt.NDArray[np.float64]]]:
+    requested = [column.lower() for column in columns]
+
+    with open(csv_path, encoding="utf-8", newline="") as file:
+        reader = csv.reader(complete_lines(file))
+
+        try:
+            header = [name.strip().lower() for name in next(reader)]
+        except StopIteration:
+            return
+
+        # resolve column indexes once rather than building a dict for every row
+        indexes = {column: header.index(column) for column in requested if column in header}
+        if not indexes:
+            return
+
+        first_column = next(iter(indexes))
+
+        while True:
+            chunk = project_rows(reader, indexes, chunk_size)
+            if len(chunk[first_column]) == 0:
+                return
+
+            yield chunk
+
+
+def read_columns(csv_path: str, columns: Iterable[str] = (FRAMETIME_COLUMN,)) -> dict[str, npt.NDArray[np.float64]]:
+    chunks = list(iter_columns(csv_path, columns))
+
+    if not chunks:
+        return {}
+
+    return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in chunks[0]}
+
+
+def valid_frametimes(frametimes: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return frametimes[np.isfinite(frametimes)]
+
+
+def read_frametimes(csv_path: str) -> npt.NDArray[np.float64]:
+    return valid_frametimes(read_columns(csv_path).get(FRAMETIME_COLUMN, np.empty(0, dtype=np.float64)))
+
+
+def capture_columns(latency: bool = True) -> tuple[str, ...]:
+    # the frametime column and optionally every latency column so that all are parsed in a single read
+    if not latency:
+        return (FRAMETIME_COLUMN,)
+
+    return (FRAMETIME_COLUMN, *(column for columns in LATENCY_COLUMNS.values() for column in columns))
+
+
+def latency_values(columns: dict[str, npt.NDArray[np.float64]]) -> dict[str, npt.NDArray[np.float64]]:
+    # values of each latency that is present in the CSV
+    latencies: dict[str, npt.NDArray[np.float64]] = {}
+
+    for name, aliases in LATENCY_COLUMNS.items():
+        if (column := next((alias for alias in aliases if alias in columns), None)) is None:
+            continue
+
+        values = valid_frametimes(columns[column])
+
+        if name == "display":
+            # frames that were never displayed are 0 in 1.6.0 and NA in 1.10.0
+            values = values[values > 0]
+
+        latencies[name] = values
+
+    return latencies
+
+
+def read_capture(
+    csv_path: str,
+    latency: bool = True,
+) -> tuple[npt.NDArray[np.float64], dict[str, npt.NDArray[np.float64]]]:
+    # returns the frametimes and the values of each latency
+    columns = read_columns(csv_path, capture_columns(latency))
+    return valid_frametimes(columns.get(FRAMETIME_COLUMN, np.empty(0, dtype=np.float64))), latency_values(columns)
+
+
+class CsvTail:
+    def __init__(self, csv_path: str, columns: Iterable[str] = (FRAMETIME_COLUMN,)) -> None:
+        self.csv_path = csv_path
+        self.requested = [column.lower() for column in columns]
+        self.offset = 0
+        self.indexes: dict[str, int] | None = None
+
+    def read(self) -> dict[str, npt.NDArray[np.float64]]:
+        # returns the values of the rows appended since the previous read
+        try:
+            with open(self.csv_path, "rb") as file:
+                file.seek(self.offset)
+                data = file.read()
+        except FileNotFoundError:
+            # PresentMon has not created the file yet
+            data = b""
+
+        # leave a partially written row for the next read
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        lines = data[:end].decode("utf-8").splitlines()
+        reader = csv.reader(lines)
+
+        if self.indexes is None:
+            try:
+                header = [name.strip().lower() for name in next(reader)]
+            except StopIteration:
+                return {}
+
+            self.indexes = {column: header.index(column) for column in self.requested if column in header}
+
+        return project_rows(reader, self.indexes)
+
+
+def trim_csv(source_path: str, destination_path: str, skip_duration: float) -> None:
+    # copies the CSV excluding the frames that start within the first skip_duration seconds
+    skip_ms = skip_duration * 1000
+
+    with (
+        open(source_path, encoding="utf-8", newline="") as source,
+        open(destination_path, "w", encoding="utf-8", newline="") as destination,
+    ):
+        header_line = source.readline()
+        destination.write(header_line)
+
+        header = [name.strip().lower() for name in next(csv.reader([header_line]), [])]
+        index = header.index(FRAMETIME_COLUMN) if FRAMETIME_COLUMN in header else None
+        elapsed_ms = 0.0
+
+        # only the skipped rows are parsed, the remaining rows are copied unmodified
+        while index is not None and elapsed_ms < skip_ms and (line := source.readline()):
+            try:
+                frametime = float(next(csv.reader([line]))[index])
+            except (IndexError, ValueError):
+                continue
+
+            if np.isfinite(frametime):
+                elapsed_ms += frametime
+
+        shutil.copyfileobj(source, destination)
+
+
+def concatenate_csvs(source_paths: list[str], destination_path: str) -> None:
+    # rows of every CSV under the header of the first, a truncated final row of a CSV is skipped
+    with open(destination_path, "w", encoding="utf-8", newline="") as destination:
+        for index, source_path in enumerate(source_paths):
+            with open(source_path, encoding="utf-8", newline="") as source:
+                lines = complete_lines(source)
+                header = next(lines, None)
+
+                if index == 0 and header is not None:
+                    destination.write(header)
+
+                destination.writelines(lines)
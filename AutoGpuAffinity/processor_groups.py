@@ -0,0 +1,118 @@
+import ctypes
+import os
+import struct
+import sys
+
+# windows schedules logical CPUs in processor groups of up to 64 CPUs and affinity masks (KAFFINITY) are relative to a
+# group, so CPUs beyond the first 64 can not be addressed by a single mask
+#
+# a CPU is identified by group * 64 + its number within the group which is the same as the CPU number on systems with a
+# single group and consistent with the topology module. CPUs outside of group 0 are labelled group:number (e.g. 1:5)
+
+GROUP_SIZE = 64
+
+
+def split_cpu(cpu: int) -> tuple[int, int]:
+    # returns the group and the number of the CPU within the group
+    return divmod(cpu, GROUP_SIZE)
+
+
+def join_cpu(group: int, number: int) -> int:
+    if not 0 <= number < GROUP_SIZE or group < 0:
+        raise ValueError(f"invalid cpu: {group}:{number}")
+
+    return group * GROUP_SIZE + number
+
+
+def cpu_label(cpu: int) -> str:
+    group, number = split_cpu(cpu)
+    return str(number) if group == 0 else f"{group}:{number}"
+
+
+def parse_cpu(label: str) -> int:
+    # e.g. 5 for CPU 5 of group 0 or 1:5 for CPU 5 of group 1
+    group, _, number = label.strip().rpartition(":")
+    return join_cpu(int(group or 0), int(number))
+
+
+def parse_cpu_array(str_array: str) -> list[int]:
+    # e.g. [0..7, 9, 1:0..1:15], ranges must not span groups
+    if str_array.strip() in ("", "[]"):
+        return []
+
+    # [1:-1] removes brackets
+    split_array = [x.strip() for x in str_array.strip()[1:-1].split(",")]
+
+    parsed_list: list[int] = []
+
+    for item in split_array:
+        if ".." in item:
+            lower, upper = (parse_cpu(label) for label in item.split(".."))
+
+            if split_cpu(lower)[0] != split_cpu(upper)[0]:
+                raise ValueError(f"range spans processor groups: {item}")
+
+            parsed_list.extend(range(lower, upper + 1))
+        else:
+            parsed_list.append(parse_cpu(item))
+
+    return parsed_list
+
+
+def available_cpus(group_sizes: list[int]) -> list[int]:
+    return [join_cpu(group, number) for group, size in enumerate(group_sizes) for number in range(size)]
+
+
+def active_group_sizes() -> list[int]:
+    # number of active logical CPUs in each processor group
+    if sys.platform != "win32":
+        # there are no processor groups outside of windows so the CPUs are numbered as if the groups were full
+        cpu_count = os.cpu_count() or 1
+        return [min(GROUP_SIZE, cpu_count - offset) for offset in range(0, cpu_count, GROUP_SIZE)]
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+    if not (group_count := kernel32.GetActiveProcessorGroupCount()):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+    return [kernel32.GetActiveProcessorCount(group) for group in range(group_count)]
+
+
+def group_affinity(cpu: int) -> bytes:
+    # GROUP_AFFINITY is a KAFFINITY mask followed by the group number and 3 reserved WORDs
+    group, number = split_cpu(cpu)
+    return struct.pack("<QH6x", 1 << number, group)
+
+
+def assignment_set_override(cpu: int) -> bytes:
+    # value of AssignmentSetOverride in the interrupt affinity policy of a device
+    group, number = split_cpu(cpu)
+
+    if group == 0:
+        # KAFFINITY without trailing zero bytes as written by the Interrupt Affinity Policy Tool
+        return (1 << number).to_bytes(8, "little").rstrip(b"\x00")
+
+    return group_affinity(cpu)
+
+
+def launch_affinity(cpu: int, numa_nodes: dict[int, list[tuple[int, int]]]) -> list[str]:
+    # arguments of the start command to launch a process on a CPU
+    # numa_nodes maps each NUMA node to the group and KAFFINITY mask of each of its groups
+    group, number = split_cpu(cpu)
+
+    if len({_group for masks in numa_nodes.values() for _group, _ in masks}) <= 1:
+        # the mask applies to the only group
+        return ["/affinity", hex(1 << number)]
+
+    # start can not select a processor group but the mask is relative to the CPUs of the node if a node is specified
+    for node, masks in sorted(numa_nodes.items()):
+        index = 0
+
+        for _group, mask in masks:
+            if _group == group and mask >> number & 1:
+                index += (mask & ((1 << number) - 1)).bit_count()
+                return ["/node", str(node), "/affinity", hex(1 << index)]
+
+            index += mask.bit_count()
+
+    raise ValueError(f"CPU {cpu_label(cpu)} does not belong to a NUMA node")
@@ -0,0 +1,39 @@
+import time
+from collections.abc import Callable
+from typing import Protocol
+
+
+class Clock(Protocol):
+    def monotonic(self) -> float: ...
+
+    def sleep(self, seconds: float) -> None: ...
+
+
+class SystemClock:
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+def wait_until(
+    probe: Callable[[], bool],
+    timeout: float,
+    interval: float = 0.25,
+    clock: Clock | None = None,
+) -> float | None:
+    # polls the probe until it reports ready and returns the time waited or None if the timeout elapsed
+    clock = clock if clock is not None else SystemClock()
+    start = clock.monotonic()
+
+    while True:
+        if probe():
+            return clock.monotonic() - start
+
+        elapsed = clock.monotonic() - start
+        if elapsed >= timeout:
+            return None
+
+        clock.sleep(min(interval, timeout - elapsed))
+
@@ -0,0 +1,301 @@
+import json
+import os
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from frametime_cache import load_frametimes
+from presentmon import read_frametimes
+from processor_groups import cpu_label
+
+# self-contained HTML report of a session with the frametimes over time and the distribution of the frametimes of each
+# CPU so that the reason a CPU performed worse (e.g. periodic stutters or a slower warm-up) is visible
+#
+# the frametimes are downsampled to the minimum and maximum of each bucket of consecutive frames so that spikes are
+# preserved and the size of the report does not depend on the length of the captures
+
+
+def min_max_downsample(
+    frametimes: npt.NDArray[np.float64],
+    max_points: int,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    # returns the start time in seconds and the frametime of the points to plot in order of time
+    times = (np.cumsum(frametimes) - frametimes) / 1000
+
+    if len(frametimes) <= max_points:
+        return times, frametimes
+
+    # a point for the minimum and maximum of each bucket
+    bucket_size = -(-len(frametimes) // max(max_points // 2, 1))
+    num_buckets = -(-len(frametimes) // bucket_size)
+
+    # the last bucket is padded with NaN which nanargmin and nanargmax ignore
+    padded = np.pad(frametimes, (0, num_buckets * bucket_size - len(frametimes)), constant_values=np.nan)
+    buckets = padded.reshape(num_buckets, bucket_size)
+    offsets = np.arange(num_buckets) * bucket_size
+
+    indices = np.unique(
+        np.concatenate([np.nanargmin(buckets, axis=1) + offsets, np.nanargmax(buckets, axis=1) + offsets]),
+    )
+
+    return times[indices], frametimes[indices]
+
+
+def frametime_histogram(
+    frametimes: npt.NDArray[np.float64],
+    bins: int,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    # the range ends at the 99.9th percentile so that a few spikes do not compress the distribution into one bin
+    # frametimes beyond the range are counted in the last bin
+    lower, upper = np.percentile(frametimes, [0, 99.9])
+    edges = np.linspace(lower, max(upper, lower + 1e-3), bins + 1)
+    counts, _ = np.histogram(np.clip(frametimes, lower, edges[-1]), edges)
+
+    return edges, counts
+
+
+def cpu_report(frametimes: npt.NDArray[np.float64], max_points: int, bins: int) -> dict[str, Any]:
+    times, values = min_max_downsample(frametimes, max_points)
+    edges, counts = frametime_histogram(frametimes, bins)
+
+    return {
+        "duration": round(float(np.sum(frametimes)) / 1000, 2),
+        "frames": len(frametimes),
+        # the histogram ends at the 99.9th percentile
+        "percentile999": round(float(edges[-1]), 3),
+        "maximum": round(float(np.max(frametimes)), 3),
+        "times": np.round(times, 3).tolist(),
+        "frametimes": np.round(values, 3).tolist(),
+        "edges": np.round(edges, 3).tolist(),
+        "counts": counts.tolist(),
+    }
+
+
+def write_report(
+    path: str,
+    csv_directory: str,
+    cpus: list[int],
+    results: dict[str, dict[str, float]],
+    headings: dict[str, str],
+    max_points: int = 1000,
+    bins: int = 100,
+    use_cache: bool = False,
+) -> None:
+    cpu_reports: list[dict[str, Any]] = []
+
+    for cpu in cpus:
+        csv_path = os.path.join(csv_directory, f"CPU-{cpu}.csv")
+        frametimes = load_frametimes(csv_path) if use_cache else read_frametimes(csv_path)
+
+        if len(frametimes) == 0:
+            continue
+
+        cpu_reports.append(
+            {
+                "cpu": cpu_label(cpu),
+                # abs is for negative values such as stdev
+                "results": {metric: round(abs(value), 2) for metric, value in results.get(str(cpu), {}).items()},
+                **cpu_report(frametimes, max_points, bins),
+            },
+        )
+
+    data = {
+        "session": os.path.basename(os.path.dirname(os.path.normpath(os.path.abspath(csv_directory)))),
+        "headings": headings,
+        "cpus": cpu_reports,
+    }
+
+    # </ is escaped so that the data can not end the script element
+    report = REPORT_TEMPLATE.replace("__DATA__", json.dumps(data, separators=(",", ":")).replace("</", "<\\/"))
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(report)
+
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>AutoGpuAffinity Report</title>
+<style>
+body { font-family: Segoe UI, sans-serif; margin: 24px; background: #1e1e1e; color: #ddd; }
+table { border-collapse: collapse; margin-bottom: 24px; }
+th, td { padding: 4px 10px; text-align: right; border-bottom: 1px solid #333; }
+tbody tr { cursor: pointer; }
+tbody tr:hover { background: #2a2a2a; }
+.cpu { margin-bottom: 24px; }
+.charts { display: flex; gap: 16px; }
+canvas { background: #252526; height: 220px; }
+.series { flex: 3; }
+.histogram { flex: 1; }
+#tooltip { position: fixed; pointer-events: none; background: #000c; padding: 4px 8px; display: none; }
+</style>
+</head>
+<body>
+<h1>AutoGpuAffinity Report</h1>
+<p id="session"></p>
+<p>
+<label>Frametime axis <select id="scale">
+<option value="percentile999">99.9th percentile of all CPUs</option>
+<option value="maximum">maximum of all CPUs</option>
+</select></label>
+</p>
+<table id="results"></table>
+<div id="cpus"></div>
+<div id="tooltip"></div>
+<script type="application/json" id="data">__DATA__</script>
+<script>
+const report = JSON.parse(document.getElementById("data").textContent);
+const tooltip = document.getElementById("tooltip");
+const pad = { left: 48, right: 8, top: 8, bottom: 24 };
+
+document.getElementById("session").textContent = report.session;
+
+function showTooltip(event, text) {
+    tooltip.textContent = text;
+    tooltip.style.display = "block";
+    tooltip.style.left = event.clientX + 12 + "px";
+    tooltip.style.top = event.clientY + 12 + "px";
+}
+
+function hideTooltip() {
+    tooltip.style.display = "none";
+}
+
+function context(canvas) {
+    const ratio = window.devicePixelRatio || 1;
+    canvas.width = canvas.clientWidth * ratio;
+    canvas.height = canvas.clientHeight * ratio;
+    const ctx = canvas.getContext("2d");
+    ctx.scale(ratio, ratio);
+    ctx.font = "11px sans-serif";
+    ctx.fillStyle = ctx.strokeStyle = "#888";
+    return ctx;
+}
+
+function axes(ctx, width, height, xLabels, yLabels) {
+    ctx.beginPath();
+    ctx.moveTo(pad.left, pad.top);
+    ctx.lineTo(pad.left, height - pad.bottom);
+    ctx.lineTo(width - pad.right, height - pad.bottom);
+    ctx.stroke();
+    ctx.textAlign = "center";
+    xLabels.forEach(([x, label]) => ctx.fillText(label, x, height - 8));
+    ctx.textAlign = "right";
+    yLabels.forEach(([y, label]) => ctx.fillText(label, pad.left - 4, y + 4));
+}
+
+function drawSeries(canvas, cpu, limit) {
+    const ctx = context(canvas);
+    const width = canvas.clientWidth, height = canvas.clientHeight;
+    const duration = Math.max(cpu.duration, 1e-3);
+    const x = (time) => pad.left + (time / duration) * (width - pad.left - pad.right);
+    const y = (value) => height - pad.bottom - (Math.min(value, limit) / limit) * (height - pad.top - pad.bottom);
+
+    axes(
+        ctx, width, height,
+        [[x(0), "0s"], [x(duration / 2), (duration / 2).toFixed(1) + "s"], [x(duration), duration.toFixed(1) + "s"]],
+        [[y(0), "0"], [y(limit / 2), (limit / 2).toFixed(1)], [y(limit), limit.toFixed(1) + "ms"]],
+    );
+
+    ctx.strokeStyle = "#4fa3e0";
+    ctx.beginPath();
+    cpu.times.forEach((time, index) => {
+        index ? ctx.lineTo(x(time), y(cpu.frametimes[index])) : ctx.moveTo(x(time), y(cpu.frametimes[index]));
+    });
+    ctx.stroke();
+
+    canvas.onmousemove = (event) => {
+        const time = ((event.offsetX - pad.left) / (width - pad.left - pad.right)) * duration;
+        // nearest point by binary search as the points are in order of time
+        let lower = 0, upper = cpu.times.length - 1;
+        while (lower < upper) {
+            const middle = (lower + upper) >> 1;
+            cpu.times[middle] < time ? (lower = middle + 1) : (upper = middle);
+        }
+        showTooltip(event, cpu.times[lower].toFixed(2) + "s: " + cpu.frametimes[lower].toFixed(2) + "ms");
+    };
+    canvas.onmouseleave = hideTooltip;
+}
+
+function drawHistogram(canvas, cpu) {
+    const ctx = context(canvas);
+    const width = canvas.clientWidth, height = canvas.clientHeight;
+    const lower = cpu.edges[0], upper = cpu.edges[cpu.edges.length - 1];
+    const peak = Math.max(...cpu.counts, 1);
+    const x = (value) => pad.left + ((value - lower) / (upper - lower)) * (width - pad.left - pad.right);
+    const y = (count) => height - pad.bottom - (count / peak) * (height - pad.top - pad.bottom);
+
+    axes(
+        ctx, width, height,
+        [[x(lower), lower.toFixed(1)], [x(upper), upper.toFixed(1) + "ms"]],
+        [[y(0), "0%"], [y(peak), ((100 * peak) / cpu.frames).toFixed(1) + "%"]],
+    );
+
+    ctx.fillStyle = "#4fa3e0";
+    cpu.counts.forEach((count, index) => {
+        const left = x(cpu.edges[index]);
+        ctx.fillRect(left, y(count), Math.max(x(cpu.edges[index + 1]) - left - 1, 1), y(0) - y(count));
+    });
+
+    canvas.onmousemove = (event) => {
+        const index = Math.floor(((event.offsetX - pad.left) / (width - pad.left - pad.right)) * cpu.counts.length);
+        if (index < 0 || index >= cpu.counts.length) {
+            return hideTooltip();
+        }
+        const range = cpu.edges[index].toFixed(2) + "-" + (index === cpu.counts.length - 1 ? "" : cpu.edges[index + 1].toFixed(2));
+        showTooltip(event, range + "ms: " + ((100 * cpu.counts[index]) / cpu.frames).toFixed(2) + "% of frames");
+    };
+    canvas.onmouseleave = hideTooltip;
+}
+
+function drawTable() {
+    const table = document.getElementById("results");
+    const metrics = Object.keys(report.headings).filter((metric) => report.cpus.every((cpu) => metric in cpu.results));
+    const head = table.createTHead().insertRow();
+    ["CPU", ...metrics.map((metric) => report.headings[metric])].forEach((heading) => {
+        head.appendChild(document.createElement("th")).textContent = heading;
+    });
+
+    const body = table.createTBody();
+    report.cpus.forEach((cpu) => {
+        const row = body.insertRow();
+        row.insertCell().textContent = cpu.cpu;
+        metrics.forEach((metric) => (row.insertCell().textContent = cpu.results[metric].toFixed(2)));
+        row.onclick = () => document.getElementById("cpu-" + cpu.cpu).scrollIntoView();
+    });
+}
+
+function drawCpus() {
+    const scale = document.getElementById("scale").value;
+    const limit = Math.max(...report.cpus.map((cpu) => cpu[scale]), 1e-3);
+    report.cpus.forEach((cpu) => {
+        drawSeries(document.getElementById("series-" + cpu.cpu), cpu, limit);
+        drawHistogram(document.getElementById("histogram-" + cpu.cpu), cpu);
+    });
+}
+
+const container = document.getElementById("cpus");
+report.cpus.forEach((cpu) => {
+    const section = container.appendChild(document.createElement("div"));
+    section.className = "cpu";
+    section.id = "cpu-" + cpu.cpu;
+    section.appendChild(document.createElement("h2")).textContent =
+        "CPU " + cpu.cpu + " (" + cpu.frames + " frames, " + cpu.duration + "s)";
+    const charts = section.appendChild(document.createElement("div"));
+    charts.className = "charts";
+    ["series", "histogram"].forEach((kind) => {
+        const canvas = charts.appendChild(document.createElement("canvas"));
+        canvas.className = kind;
+        canvas.id = kind + "-" + cpu.cpu;
+    });
+});
+
+drawTable();
+drawCpus();
+document.getElementById("scale").onchange = drawCpus;
+window.onresize = drawCpus;
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,532 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from configparser import ConfigParser
+from typing import Any
+
+# analysis and display of the results of a session
+#
+# this module does not depend on windows so that sessions can be analyzed on any OS. modules that import numpy are
+# imported when they are used rather than at module load so that the CLI starts quickly
+
+logger = logging.getLogger("CLI")
+
+
+def table_headings() -> dict[str, str]:
+    # heading of each column in the results table in the order of the columns
+    from compute_frametimes import LATENCY_PERCENTILES, METRIC_VALUES
+
+    latency_headings = {
+        "average": "Avg",
+        **{f"percentile{value}": f"{value} %ile" for value in LATENCY_PERCENTILES},
+        "maximum": "Max",
+    }
+
+    return {
+        "duration": "Length",
+        # only present if the warm-up was detected
+        "warmup": "Warm-up",
+        "maximum": "Max",
+        "average": "Avg",
+        "minimum": "Min",
+        "stdev": "STDEV",
+        **{f"percentile{value}": f"{value} %ile" for value in METRIC_VALUES},
+        **{f"lows{value}": f"{value}% Low" for value in METRIC_VALUES},
+        # only present if the latency analysis is enabled, in milliseconds
+        **{
+            f"{name}_{metric}": f"{label} {heading}"
+            for name, label in (("present_api", "API"), ("render", "Render"), ("display", "Display"))
+            for metric, heading in latency_headings.items()
+        },
+        # only present if xperf reports were generated
+        "dpc_time": "DPC ms",
+        "isr_latency99": "ISR 99 us",
+        # only present if the timeline analysis is enabled
+        "stutter_density": "Stutters/min",
+    }
+
+
+def native_path(path: str) -> str:
+    # paths in the config use backslashes
+    return os.path.normpath(path.replace("\\", "/"))
+
+
+def store_path(config: ConfigParser) -> str:
+    # relative paths are relative to the program directory as main.py changes to it, so that the standalone CLI uses
+    # the same database regardless of the current directory
+    path = native_path(config.get("results store", "path", fallback="captures\\results.db"))
+
+    if os.path.isabs(path):
+        return path
+
+    program_path = os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else os.path.dirname(__file__)
+    return os.path.join(os.path.abspath(program_path), path)
+
+
+def supports_color() -> bool:
+    if not sys.stdout.isatty():
+        return False
+
+    # ANSI escape sequences are supported by the console since Windows 10
+    return sys.platform != "win32" or sys.getwindowsversion().major >= 10
+
+
+def resize_console() -> None:
+    if sys.platform == "win32":
+        os.system("<nul set /p=\x1B[8;50;1000t")
+
+
+def print_table(formatted_results: dict[str, dict[str, str]]):
+    headings = table_headings()
+    # columns are wider than 12 characters if the heading is longer e.g. Display 99.9 %ile
+    widths = {metric: max(12, len(headings[metric]) + 2) for metric in next(iter(formatted_results.values()), {})}
+
+    # print table headings
+    print(f"{'CPU':<7}", end="")
+
+    for metric, width in widths.items():
+        print(f"{headings[metric]:<{width}}", end="")
+
+    print()  # new line
+
+    from processor_groups import cpu_label
+
+    # print values for each heading
+    for _cpu, _results in formatted_results.items():
+        # CPUs are stored by their identifier and displayed as group:number outside of group 0
+        print(f"{cpu_label(int(_cpu)):<7}", end="")
+        for metric, metric_value in _results.items():
+            # padding needs to be larger to compensate for color chars
+            right_padding = widths[metric] + 9 if "[" in metric_value else widths[metric]
+            print(f"{metric_value:<{right_padding}}", end="")
+        print()  # new line
+
+    print()  # new line
+
+
+def analysis_options(config: ConfigParser) -> dict[str, Any]:
+    workers = 1
+    if config.getboolean("analysis", "parallel", fallback=True):
+        # 0 implies one worker per logical CPU
+        workers = config.getint("analysis", "workers", fallback=0) or os.cpu_count() or 1
+
+    return {
+        "workers": workers,
+        "use_cache": config.getboolean("analysis", "cache", fallback=True),
+        "relative_accuracy": (
+            config.getfloat("analysis", "relative_accuracy", fallback=0.001)
+            if config.getboolean("analysis", "streaming", fallback=False)
+            else None
+        ),
+        # 0 disables confidence intervals
+        "resamples": config.getint("analysis", "bootstrap_resamples", fallback=0),
+        "confidence": config.getfloat("analysis", "confidence", fallback=0.95),
+        "latencies": (
+            tuple(name.strip() for name in config.get("latency", "columns", fallback="").split(",") if name.strip())
+            if config.getboolean("latency", "enabled", fallback=False)
+            else ()
+        ),
+    }
+
+
+def ranked_metrics(config: ConfigParser) -> list[str] | None:
+    # None implies every metric is ranked
+    metrics = [metric.strip() for metric in config.get("analysis", "rank_metrics", fallback="").split(",")]
+    return [metric for metric in metrics if metric] or None
+
+
+def is_significant_lead(
+    cpu: str,
+    metric: str,
+    results: dict[str, dict[str, float]],
+    intervals: dict[str, dict[str, tuple[float, float]]],
+) -> bool:
+    # metrics without an interval such as the DPC/ISR columns are not tested
+    if metric not in intervals.get(cpu, {}):
+        return True
+
+    lower_bound = intervals[cpu][metric][0]
+
+    # the interval must not overlap with the interval of any CPU with a lower value
+    return all(
+        lower_bound > _intervals[metric][1]
+        for _cpu, _intervals in intervals.items()
+        if metric in _intervals and results[_cpu][metric] < results[cpu][metric]
+    )
+
+
+def export_results(
+    path: str,
+    results: dict[str, dict[str, float]],
+    intervals: dict[str, dict[str, tuple[float, float]]],
+    deviations: dict[str, dict[str, float]] | None = None,
+) -> None:
+    # deviations is the standard deviation of each metric between rounds
+    deviations = deviations or {}
+
+    export = {
+        cpu: {
+            metric: {
+                # abs is for negative values such as stdev
+                "value": abs(value),
+                **(
+                    {"lower": min(map(abs, intervals[cpu][metric])), "upper": max(map(abs, intervals[cpu][metric]))}
+                    if metric in intervals.get(cpu, {})
+                    else {}
+                ),
+                **({"round_stdev": deviations[cpu][metric]} if metric in deviations.get(cpu, {}) else {}),
+            }
+            for metric, value in _results.items()
+        }
+        for cpu, _results in results.items()
+    }
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(export, file, indent=4)
+
+
+def format_results(
+    results: dict[str, dict[str, float]],
+    intervals: dict[str, dict[str, tuple[float, float]]],
+    enable_color: bool,
+    ranked: list[str] | None = None,
+    candidates: list[str] | None = None,
+) -> dict[str, dict[str, str]]:
+    # ranked is the metrics to highlight the best values of, every metric if None
+    # candidates is the CPUs that are compared for highlighting, every CPU if None
+    # each index represents the rank (e.g. index 0 is 1st)
+    colors: list[str] = [
+        "\x1b[92m",  # Green
+        "\x1b[93m",  # Yellow
+    ]
+
+    if enable_color:
+        default = "\x1b[0m"
+        if sys.platform == "win32":
+            os.system("color")
+    else:
+        default = ""
+
+    ranked_results = {cpu: _results for cpu, _results in results.items() if candidates is None or cpu in candidates}
+    ranked_intervals = {cpu: _intervals for cpu, _intervals in intervals.items() if cpu in ranked_results}
+
+    num_cpus = len(ranked_results)
+    # 1 CPUs means no ranking will be done
+    # 2 CPUs means only one metric will be ranked since it's binary
+    # always leave last place unranked
+
+    top_n_values = num_cpus - 1 if num_cpus < 3 else len(colors)
+
+    # the only CPU that reached the final round of a search is the best
+    if candidates is not None and num_cpus == 1:
+        top_n_values = 1
+
+    # length of each capture and warm-up which may differ between CPUs e.g. with early stop or search mode
+    # these are not ranked
+    unranked = [metric for metric in ("duration", "warmup") if all(metric in _results for _results in results.values())]
+
+    formatted_results: dict[str, dict[str, str]] = {
+        cpu: {metric: f"{_results[metric]:.1f}s" for metric in unranked} for cpu, _results in results.items()
+    }
+
+    # analyze best values for each metric that is available for every CPU
+    for metric in table_headings():
+        if metric in unranked or not all(metric in _results for _results in results.values()):
+            continue
+
+        # set of all values within the metric
+        values = {_results[metric] for _results in ranked_results.values()}
+
+        # create ordered list without duplicates of top n values
+        top_values = list(dict.fromkeys(sorted(values, reverse=True)[:top_n_values]))
+
+        for _cpu, _results in results.items():
+            metric_value = _results[metric]
+
+            # abs is for negative values such as stdev
+            # :.2f is for .00 numerical formatting
+            new_value = f"{abs(metric_value):.2f}"
+
+            # determine rank of value
+            if enable_color and (ranked is None or metric in ranked) and _cpu in ranked_results:
+                try:
+                    nth_best = top_values.index(metric_value)
+
+                    # only highlight values that are better than the rest beyond the noise of the capture
+                    if ranked_intervals.get(_cpu) and not is_significant_lead(
+                        _cpu,
+                        metric,
+                        ranked_results,
+                        ranked_intervals,
+                    ):
+                        raise ValueError
+
+                    color = colors[nth_best]
+                    new_value = f"{color}{new_value}{default}"
+                except ValueError:
+                    # don't highlight value as top n by leaving it unmodified
+                    pass
+
+            formatted_results[_cpu][metric] = new_value
+
+    return formatted_results
+
+
+def display_results(csv_directory: str, enable_color: bool, config: ConfigParser) -> None:
+    import tempfile
+
+    from analysis import merge_rounds
+    from rounds import round_directories
+
+    # the session directory is the parent of the CSVs directory
+    session_directory = os.path.dirname(os.path.normpath(os.path.abspath(csv_directory)))
+    round_paths = round_directories(csv_directory)
+
+    if not round_paths:
+        display_session(session_directory, csv_directory, [], enable_color, config)
+        return
+
+    # the captures of sessions with multiple rounds are merged so that the results are pooled across the rounds. they
+    # are merged into a temporary directory rather than the session directory so that analyzing an archived session
+    # does not write to it
+    with tempfile.TemporaryDirectory(prefix="AutoGpuAffinity-", ignore_cleanup_errors=True) as merged_directory:
+        try:
+            merge_rounds(round_paths, merged_directory)
+        except OSError as e:
+            logger.error("unable to merge the captures of each round. %s", e)
+            return
+
+        display_session(session_directory, merged_directory, round_paths, enable_color, config)
+
+
+def display_session(
+    session_directory: str,
+    csv_directory: str,
+    round_paths: list[str],
+    enable_color: bool,
+    config: ConfigParser,
+) -> None:
+    # csv_directory contains the CSV of each CPU pooled across the rounds in round_paths
+    import sqlite3
+
+    import numpy as np
+    import numpy.typing as npt
+    from analysis import analyze_cpus, analyze_timelines, list_cpus, round_deviations, search_finalists
+    from dpcisr import summarize_report
+    from presentmon import read_frametimes
+    from results_store import downsample, ingest_session
+
+    cpus = list_cpus(csv_directory)
+    results, intervals = analyze_cpus(csv_directory, cpus, **analysis_options(config))
+
+    # variation of the results of each CPU between rounds
+    deviations = round_deviations(
+        [
+            analyze_cpus(round_path, list_cpus(round_path), **{**analysis_options(config), "resamples": 0})[0]
+            for round_path in round_paths
+        ],
+    )
+
+    # add DPC/ISR columns if every CPU has a dpcisr report (of every round)
+    xperf_directories = [
+        os.path.join(session_directory, "xperf", os.path.basename(round_path)) for round_path in round_paths
+    ] or [os.path.join(session_directory, "xperf")]
+    report_paths = {
+        str(cpu): [os.path.join(xperf_directory, f"CPU-{cpu}.txt") for xperf_directory in xperf_directories]
+        for cpu in cpus
+    }
+
+    if cpus and all(os.path.exists(report_path) for paths in report_paths.values() for report_path in paths):
+        for cpu, paths in report_paths.items():
+            reports = [summarize_report(report_path) for report_path in paths]
+
+            # mean of the rounds, negate so that the lowest time and latency are ranked best
+            results[cpu]["dpc_time"] = -round(float(np.mean([report["dpc_time"] for report in reports])), 2)
+            results[cpu]["isr_latency99"] = -round(float(np.mean([report["isr_latency99"] for report in reports])), 2)
+
+    # warm-up of each CPU if it was detected during the session
+    try:
+        with open(os.path.join(session_directory, "warmup.json"), encoding="utf-8") as file:
+            warmups: dict[str, float] = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        warmups = {}
+
+    if cpus and all(cpu in warmups for cpu in results):
+        for cpu, cpu_results in results.items():
+            cpu_results["warmup"] = round(warmups[cpu], 2)
+
+    timelines: dict[str, dict[str, Any]] = {}
+
+    if config.getboolean("timeline", "enabled", fallback=False):
+        options = analysis_options(config)
+        timelines = analyze_timelines(
+            csv_directory,
+            cpus,
+            options["workers"],
+            options["use_cache"],
+            config.getfloat("timeline", "window", fallback=1.0),
+            config.getfloat("timeline", "stutter_factor", fallback=2.5),
+        )
+
+        for cpu, timeline in timelines.items():
+            # negate so that the fewest stutters are ranked best
+            results[cpu]["stutter_density"] = -round(timeline["stutter_density"], 2)
+
+    # CPUs that were eliminated by a search were captured for less time and rarely capture a stutter so only the
+    # CPUs that reached the final round are highlighted
+    finalists = search_finalists(session_directory)
+    candidates = [str(cpu) for cpu in finalists] if finalists is not None else None
+
+    if candidates is not None:
+        logger.info("only the %d CPUs that reached the final search round are highlighted", len(candidates))
+
+    formatted_results = format_results(results, intervals, enable_color, ranked_metrics(config), candidates)
+
+    resize_console()
+
+    print_table(formatted_results)
+
+    if deviations:
+        logger.info("standard deviation of the results of each CPU between %d rounds", len(round_paths))
+        print_table(format_results(deviations, {}, False))
+
+    results_path = os.path.join(session_directory, "results.json")
+
+    try:
+        export_results(results_path, results, intervals, deviations)
+        logger.info("results exported to %s", results_path)
+    except OSError as e:
+        logger.warning("unable to export results to %s. %s", results_path, e)
+
+    if timelines:
+        timeline_path = os.path.join(session_directory, "timeline.json")
+
+        try:
+            with open(timeline_path, "w", encoding="utf-8") as file:
+                json.dump(timelines, file)
+            logger.info("timeline exported to %s", timeline_path)
+        except OSError as e:
+            logger.warning("unable to export timeline to %s. %s", timeline_path, e)
+
+    if config.getboolean("report", "enabled", fallback=False):
+        from report import write_report
+
+        report_path = os.path.join(session_directory, "report.html")
+
+        try:
+            write_report(
+                report_path,
+                csv_directory,
+                cpus,
+                results,
+                table_headings(),
+                config.getint("report", "max_points", fallback=1000),
+                config.getint("report", "bins", fallback=100),
+                analysis_options(config)["use_cache"],
+            )
+            logger.info("report exported to %s", report_path)
+        except OSError as e:
+            logger.warning("unable to export report to %s. %s", report_path, e)
+
+    if config.getboolean("results store", "enabled", fallback=False):
+        frametimes: dict[str, npt.NDArray[np.float32]] = {}
+
+        if (max_points := config.getint("results store", "downsample", fallback=0)) > 0:
+            frametimes = {
+                str(cpu): downsample(read_frametimes(os.path.join(csv_directory, f"CPU-{cpu}.csv")), max_points)
+                for cpu in cpus
+            }
+
+        try:
+            ingest_session(store_path(config), session_directory, results, frametimes)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("unable to store results. %s", e)
+
+
+def display_comparison(
+    db_path: str,
+    sessions: list[str],
+    enable_color: bool,
+    ranked: list[str] | None = None,
+) -> None:
+    from results_store import pooled_results
+
+    results, num_sessions = pooled_results(db_path, sessions)
+
+    if not results:
+        logger.error("no stored sessions found")
+        return
+
+    logger.info("pooled results of %d sessions", num_sessions)
+
+    resize_console()
+
+    print_table(
+        format_results(
+            {cpu: {metric: round(value, 2) for metric, value in _results.items()} for cpu, _results in results.items()},
+            {},
+            enable_color,
+            ranked,
+        ),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(format="[%(name)s] %(levelname)s: %(message)s", level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="analyze and compare AutoGpuAffinity sessions on any OS")
+    parser.add_argument(
+        "--config",
+        metavar="<config>",
+        type=str,
+        help="path to config file",
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument(
+        "--analyze",
+        metavar="<csv directory>",
+        type=str,
+        help="analyze csv files from a previous benchmark",
+    )
+    group.add_argument(
+        "--compare",
+        metavar="<session>",
+        type=str,
+        nargs="*",
+        help="rank CPUs by the pooled results of stored sessions (all sessions if none are specified)",
+    )
+    args = parser.parse_args(argv)
+
+    # defaults to the config next to this module so that the CLI can be run from any directory
+    config_path = args.config or os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.ini")
+
+    # ConfigParser.read silently ignores missing files
+    if not os.path.exists(config_path):
+        logger.error("config file not found")
+        return 1
+
+    # delimiters=("=") is required for file path errors with colons
+    config = ConfigParser(delimiters="=")
+    config.read(config_path)
+
+    if args.analyze:
+        if not os.path.isdir(args.analyze):
+            logger.error("csv directory not found")
+            return 1
+
+        display_results(args.analyze, supports_color(), config)
+    else:
+        display_comparison(
+            store_path(config),
+            args.compare,
+            supports_color(),
+            ranked_metrics(config),
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    timestamp TEXT,
+    subject TEXT,
+    driver_version TEXT,
+    os_version TEXT,
+    config TEXT
+);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    cpu TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (session_id, cpu, metric)
+);
+
+CREATE INDEX IF NOT EXISTS metrics_cpu_metric ON metrics (cpu, metric);
+
+CREATE TABLE IF NOT EXISTS frametimes (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    cpu TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (session_id, cpu)
+);
+"""
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    if directory := os.path.dirname(db_path):
+        os.makedirs(directory, exist_ok=True)
+
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def read_session_metadata(session_directory: str) -> dict[str, Any]:
+    # written at the start of a session, older sessions do not have one
+    try:
+        with open(os.path.join(session_directory, "session.json"), encoding="utf-8") as file:
+            metadata: dict[str, Any] = json.load(file)
+            return metadata
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def downsample(frametimes: npt.NDArray[np.float64], max_points: int) -> npt.NDArray[np.float32]:
+    # mean of equally sized buckets of consecutive frames
+    if len(frametimes) <= max_points:
+        return frametimes.astype(np.float32)
+
+    bucket_size = -(-len(frametimes) // max_points)
+    padded = np.pad(frametimes, (0, bucket_size * max_points - len(frametimes)), constant_values=np.nan)
+    return np.nanmean(padded.reshape(max_points, bucket_size), axis=1).astype(np.float32)
+
+
+def ingest_session(
+    db_path: str,
+    session_directory: str,
+    results: dict[str, dict[str, float]],
+    frametimes: dict[str, npt.NDArray[np.float32]] | None = None,
+) -> None:
+    session_path = os.path.normcase(os.path.abspath(session_directory))
+    metadata = read_session_metadata(session_directory)
+
+    with connect(db_path) as connection:
+        # replace the results of a session that is analyzed again
+        connection.execute("DELETE FROM sessions WHERE path = ?", (session_path,))
+        session_id = connection.execute(
+            "INSERT INTO sessions (path, timestamp, subject, driver_version, os_version, config) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                session_path,
+                metadata.get("timestamp"),
+                metadata.get("subject"),
+                metadata.get("driver_version"),
+                metadata.get("os_version"),
+                json.dumps(metadata["config"]) if "config" in metadata else None,
+            ),
+        ).lastrowid
+
+        connection.executemany(
+            "INSERT INTO metrics (session_id, cpu, metric, value) VALUES (?, ?, ?, ?)",
+            (
+                (session_id, cpu, metric, value)
+                for cpu, cpu_results in results.items()
+                for metric, value in cpu_results.items()
+            ),
+        )
+
+        if frametimes:
+            connection.executemany(
+                "INSERT INTO frametimes (session_id, cpu, data) VALUES (?, ?, ?)",
+                ((session_id, cpu, data.tobytes()) for cpu, data in frametimes.items()),
+            )
+
+    connection.close()
+
+
+def pooled_results(db_path: str, sessions: list[str] | None = None) -> tuple[dict[str, dict[str, float]], int]:
+    # returns the mean of each metric per CPU across sessions and the number of sessions that were pooled
+    query = "SELECT m.cpu, m.metric, AVG(m.value) FROM metrics m JOIN sessions s ON s.id = m.session_id"
+    count_query = "SELECT COUNT(*) FROM sessions s"
+    parameters: list[str] = []
+
+    if sessions:
+        # session directories are matched by name e.g. AutoGpuAffinity-170523162424
+        condition = " WHERE " + " OR ".join("s.path LIKE ?" for _ in sessions)
+        parameters = [f"%{os.path.normcase(session)}" for session in sessions]
+        query += condition
+        count_query += condition
+
+    with connect(db_path) as connection:
+        rows = connection.execute(f"{query} GROUP BY m.cpu, m.metric", parameters).fetchall()
+        (num_sessions,) = connection.execute(count_query, parameters).fetchone()
+
+    connection.close()
+
+    results: dict[str, dict[str, float]] = {}
+    for cpu, metric, value in rows:
+        results.setdefault(cpu, {})[metric] = value
+
+    # numerical CPU order
+    return dict(sorted(results.items(), key=lambda item: int(item[0]))), num_sessions
@@ -0,0 +1,57 @@
+import os
+import random
+
+# benchmarking every CPU in multiple rounds with a different order in each round spreads the captures of each CPU
+# across the session so that drift (e.g. thermal soak, boost clock decay or background tasks) does not bias the CPUs
+# that are benchmarked last
+#
+# the captures of each round are stored in CSVs\round-<index> and are merged into a single CSV per CPU for analysis
+
+ORDERS = ("sequential", "random", "latin")
+
+
+def latin_square(num_items: int) -> list[list[int]]:
+    # williams design, each item is in each position once and follows every other item once (twice for an odd number
+    # of items, which requires twice as many rows) so that carry-over from the previous CPU is balanced as well
+    first_row = [index // 2 if index % 2 == 0 else num_items - (index + 1) // 2 for index in range(num_items)]
+    rows = [[(item + shift) % num_items for item in first_row] for shift in range(num_items)]
+
+    if num_items % 2 == 1:
+        rows.extend([row[::-1] for row in rows])
+
+    return rows
+
+
+def round_orders(cpus: list[int], num_rounds: int, order: str = "latin", seed: int | None = None) -> list[list[int]]:
+    # returns the order of the cpus in each round
+    if order not in ORDERS:
+        raise ValueError(f"invalid round order: {order}")
+
+    if order == "sequential":
+        return [list(cpus) for _ in range(num_rounds)]
+
+    rng = random.Random(seed)
+
+    if order == "random":
+        return [rng.sample(cpus, len(cpus)) for _ in range(num_rounds)]
+
+    # rows are used in a random order and cycle if there are more rounds than rows
+    rows = latin_square(len(cpus))
+    rng.shuffle(rows)
+
+    return [[cpus[item] for item in rows[round_index % len(rows)]] for round_index in range(num_rounds)]
+
+
+def round_directory(csv_directory: str, round_index: int) -> str:
+    return os.path.join(csv_directory, f"round-{round_index}")
+
+
+def round_directories(csv_directory: str) -> list[str]:
+    # round directories of a session in order of the rounds, empty if the session has a single round
+    indexes = sorted(
+        int(name[6:])
+        for name in os.listdir(csv_directory)
+        if name.startswith("round-") and name[6:].isdigit() and os.path.isdir(os.path.join(csv_directory, name))
+    )
+
+    return [round_directory(csv_directory, index) for index in indexes]
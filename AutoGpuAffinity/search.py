@@ -0,0 +1,68 @@
+import math
+from collections.abc import Callable
+
+
+def halving_schedule(
+    num_candidates: int,
+    screening_duration: int,
+    final_duration: int,
+    eta: int = 3,
+    time_budget: int = 0,
+    capture_overhead: int = 0,
+) -> list[tuple[int, int]]:
+    # returns the number of candidates and the capture duration of each round
+    # every round keeps the best 1/eta of the candidates and captures eta times longer until the final duration
+    if eta < 2 or screening_duration <= 0:
+        raise ValueError("eta must be at least 2 and the screening duration must be positive")
+
+    rounds: list[tuple[int, int]] = []
+    remaining = num_candidates
+    duration = screening_duration
+
+    while remaining > 1 and duration < final_duration:
+        rounds.append((remaining, duration))
+        remaining = math.ceil(remaining / eta)
+        duration *= eta
+
+    rounds.append((remaining, final_duration))
+
+    if time_budget <= 0:
+        return rounds
+
+    # scale the capture durations down so that the session fits within the time budget
+    num_captures = sum(candidates for candidates, _ in rounds)
+    capture_time = sum(candidates * duration for candidates, duration in rounds)
+    available_time = time_budget - num_captures * capture_overhead
+
+    if available_time >= capture_time:
+        return rounds
+
+    factor = available_time / capture_time
+
+    if factor * min(duration for _, duration in rounds) < 1:
+        raise ValueError("time budget is too small to screen every candidate")
+
+    return [(candidates, int(duration * factor)) for candidates, duration in rounds]
+
+
+def successive_halving(
+    candidates: list[int],
+    schedule: list[tuple[int, int]],
+    run_round: Callable[[int, list[int], int], dict[int, float]],
+) -> dict[int, int]:
+    # run_round(round_index, cpus, duration) benchmarks the cpus and returns a score for each where higher is better
+    # returns the index of the last round that each candidate took part in
+    last_round = {cpu: 0 for cpu in candidates}
+    remaining = list(candidates)
+
+    for round_index, (num_candidates, duration) in enumerate(schedule):
+        remaining = remaining[:num_candidates]
+        scores = run_round(round_index, remaining, duration)
+
+        for cpu in remaining:
+            last_round[cpu] = round_index
+
+        # stable sort so that ties keep the order of the candidates
+        remaining.sort(key=lambda cpu: scores[cpu], reverse=True)
+
+    return last_round
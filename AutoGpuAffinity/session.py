@@ -0,0 +1,349 @@
+import json
+import logging
+import os
+import shutil
+from configparser import ConfigParser
+
+from analysis import analyze_csv
+from backend import Backend
+from compute_frametimes import METRIC_NAMES
+from convergence import wait_for_convergence
+from journal import SessionJournal
+from pipeline import PostProcessor
+from presentmon import trim_csv
+from processor_groups import cpu_label
+from readiness import wait_until
+from results import analysis_options
+from rounds import ORDERS, round_directory, round_orders
+from search import successive_halving
+from session_trace import PhaseTracer
+from warmup import wait_for_warmup
+
+logger = logging.getLogger("CLI")
+
+
+class SessionError(Exception):
+    pass
+
+
+def early_stop_metrics(config: ConfigParser) -> list[str]:
+    # metrics that must converge before a capture is stopped early
+    return [metric.strip() for metric in config.get("early stop", "metrics").split(",") if metric.strip()]
+
+
+def validate_config(config: ConfigParser) -> None:
+    # settings of a session that do not depend on the system, shared by the CLI and the simulation
+    if config.getint("settings", "cache_duration") < 0 or config.getint("settings", "benchmark_duration") <= 0:
+        raise SessionError("invalid durations specified")
+
+    if config.getboolean("early stop", "enabled", fallback=False) and not (
+        0 <= config.getfloat("early stop", "min_duration") <= config.getint("settings", "benchmark_duration")
+        and config.getfloat("early stop", "tolerance") > 0
+        and all(metric in METRIC_NAMES for metric in early_stop_metrics(config))
+    ):
+        raise SessionError("invalid early stop settings specified")
+
+    if config.getboolean("search", "enabled", fallback=False) and not (
+        config.getint("search", "screening_duration") > 0
+        and config.getint("search", "eta") >= 2
+        and config.get("search", "metric", fallback="lows1") in METRIC_NAMES
+    ):
+        raise SessionError("invalid search settings specified")
+
+    num_rounds = config.getint("rounds", "count", fallback=1)
+
+    if num_rounds < 1 or config.get("rounds", "order", fallback="latin") not in ORDERS:
+        raise SessionError("invalid rounds settings specified")
+
+    if num_rounds > 1 and config.getboolean("search", "enabled", fallback=False):
+        raise SessionError("multiple rounds can not be combined with search")
+
+
+class Benchmark:
+    def __init__(
+        self,
+        config: ConfigParser,
+        backend: Backend,
+        post_processor: PostProcessor | None = None,
+        tracer: PhaseTracer | None = None,
+    ) -> None:
+        self.config = config
+        self.backend = backend
+        self.post_processor = post_processor
+        self.tracer = tracer if tracer is not None else PhaseTracer()
+        self.readiness_timeout = config.getint("settings", "readiness_timeout", fallback=30)
+        # detected warm-up of each CPU in seconds
+        self.warmups: dict[int, float] = {}
+
+    def run(self, cpu: int, duration: int, csv_path: str, xperf_path: str) -> None:
+        # xperf_path is the path of the ETL and report excluding the file extension
+        config = self.config
+        backend = self.backend
+        phase = self.tracer.phase
+
+        # surface errors of previous CPUs before changing the affinity again
+        if self.post_processor is not None:
+            self.post_processor.raise_if_failed()
+
+        logger.info("benchmarking CPU %s", cpu_label(cpu))
+
+        with phase("apply affinity", cpu=cpu):
+            backend.apply_affinity(cpu)
+
+            if wait_until(backend.driver_ready, self.readiness_timeout, clock=backend.clock) is None:
+                logger.warning("graphics driver is not ready after %ds, continuing", self.readiness_timeout)
+
+        if (profile := config.getint("MSI Afterburner", "profile")) > 0:
+            with phase("afterburner", cpu=cpu):
+                backend.load_profile(profile)
+
+        with phase("launch subject", cpu=cpu):
+            backend.launch_subject(cpu if config.getboolean("settings", "sync_driver_affinity") else None)
+
+            # wait for the subject to launch and show its window rather than a fixed offset
+            if wait_until(backend.subject_ready, self.readiness_timeout, clock=backend.clock) is None:
+                logger.warning("subject is not ready after %ds, continuing", self.readiness_timeout)
+
+        if config.getboolean("warmup", "enabled", fallback=False):
+            self.capture_after_warmup(cpu, duration, csv_path)
+        else:
+            with phase("cache", cpu=cpu):
+                backend.clock.sleep(config.getint("settings", "cache_duration"))
+
+            self.start_trace(cpu)
+            self.capture(cpu, duration, csv_path)
+
+        if not os.path.exists(csv_path):
+            raise SessionError("csv log unsuccessful, this may be due to a missing dependency or windows component")
+
+        # before the trace is stopped so that the report which may be generated in the background is not killed
+        with phase("kill processes", cpu=cpu):
+            backend.kill_processes()
+
+        self.stop_trace(cpu, xperf_path)
+
+        # populate the frametime cache so that the results are displayed without parsing the CSVs
+        if self.post_processor is not None and config.getboolean("analysis", "cache", fallback=True):
+
+            def analyze() -> None:
+                with phase("analysis", cpu=cpu):
+                    # the same latencies as the results table so that the cached metrics are reused
+                    analyze_csv(csv_path, use_cache=True, latencies=analysis_options(config)["latencies"])
+
+            self.post_processor.submit(analyze)
+
+    def start_trace(self, cpu: int) -> None:
+        if self.config.getboolean("xperf", "enabled"):
+            with self.tracer.phase("xperf start", cpu=cpu):
+                self.backend.start_trace()
+
+    def capture(self, cpu: int, duration: int, csv_path: str) -> None:
+        config = self.config
+
+        with self.tracer.phase("capture", cpu=cpu, duration=duration):
+            capture = self.backend.start_capture(csv_path, duration)
+
+            if config.getboolean("early stop", "enabled", fallback=False):
+                captured_duration = wait_for_convergence(
+                    csv_path,
+                    capture.running,
+                    min(config.getfloat("early stop", "min_duration"), duration),
+                    duration,
+                    config.getfloat("early stop", "tolerance"),
+                    early_stop_metrics(config),
+                    sleep=self.backend.clock.sleep,
+                )
+
+                capture.stop()
+                logger.info("captured %.1fs of frames on CPU %s", captured_duration, cpu_label(cpu))
+            else:
+                capture.wait()
+
+    def capture_after_warmup(self, cpu: int, duration: int, csv_path: str) -> None:
+        # capture from launch and remove the warm-up from the CSV once it has been detected
+        config = self.config
+        capture_path = os.path.join(os.path.dirname(csv_path), "warmup", os.path.basename(csv_path))
+        max_warmup = config.getfloat("warmup", "max_duration", fallback=30)
+        early_stop = config.getboolean("early stop", "enabled", fallback=False)
+
+        os.makedirs(os.path.dirname(capture_path), exist_ok=True)
+
+        # margin for the delay between the warm-up being detected and the capture starting
+        capture = self.backend.start_capture(capture_path, max_warmup + duration + 5)
+
+        with self.tracer.phase("warm-up", cpu=cpu):
+            warmup, _ = wait_for_warmup(
+                capture_path,
+                capture.running,
+                max_warmup,
+                config.getfloat("warmup", "batch_duration", fallback=0.5),
+                config.getfloat("warmup", "min_stable", fallback=5),
+                sleep=self.backend.clock.sleep,
+            )
+
+        logger.info("detected %.1fs of warm-up on CPU %s", warmup, cpu_label(cpu))
+        self.warmups[cpu] = warmup
+        self.start_trace(cpu)
+
+        # frames captured since the end of the warm-up count towards the duration
+        with self.tracer.phase("capture", cpu=cpu, duration=duration):
+            wait_for_convergence(
+                capture_path,
+                capture.running,
+                min(config.getfloat("early stop", "min_duration"), duration) if early_stop else duration,
+                duration,
+                config.getfloat("early stop", "tolerance"),
+                early_stop_metrics(config),
+                sleep=self.backend.clock.sleep,
+                skip_duration=warmup,
+            )
+
+            capture.stop()
+
+        if os.path.exists(capture_path):
+            trim_csv(capture_path, csv_path, warmup)
+
+    def stop_trace(self, cpu: int, xperf_path: str) -> None:
+        config = self.config
+
+        if config.getboolean("xperf", "enabled"):
+            with self.tracer.phase("xperf stop", cpu=cpu):
+                self.backend.stop_trace(f"{xperf_path}.etl")
+
+            def generate_report() -> None:
+                with self.tracer.phase("report", cpu=cpu):
+                    self.backend.generate_report(
+                        f"{xperf_path}.etl",
+                        f"{xperf_path}.txt",
+                        config.getboolean("xperf", "save_etls"),
+                    )
+
+            if self.post_processor is not None:
+                self.post_processor.submit(generate_report)
+            else:
+                generate_report()
+
+
+def run_session(
+    config: ConfigParser,
+    benchmark: Benchmark,
+    session_directory: str,
+    benchmark_cpus: list[int],
+    search_schedule: list[tuple[int, int]],
+    journal: SessionJournal | None = None,
+) -> None:
+    # benchmarks each CPU and stores the CSV of each CPU in the CSVs folder of the session directory
+    # captures that the journal records as complete are skipped so that an interrupted session can be resumed
+    csv_directory = os.path.join(session_directory, "CSVs")
+    xperf_directory = os.path.join(session_directory, "xperf")
+
+    def run(cpu: int, duration: int, csv_path: str, xperf_path: str) -> None:
+        if journal is not None:
+            if (entry := journal.completed(csv_path)) is not None:
+                logger.info("skipping CPU %s as it has already been benchmarked", cpu_label(cpu))
+
+                if "warmup" in entry:
+                    benchmark.warmups[cpu] = entry["warmup"]
+
+                return
+
+            journal.capture(cpu, csv_path)
+
+        benchmark.run(cpu, duration, csv_path, xperf_path)
+
+        if journal is not None:
+            journal.complete(cpu, csv_path, benchmark.warmups.get(cpu))
+
+    if config.getboolean("search", "enabled", fallback=False):
+        if config.getint("rounds", "count", fallback=1) > 1:
+            raise SessionError("multiple rounds can not be combined with search")
+
+        key_metric = config.get("search", "metric", fallback="lows1")
+
+        def run_round(round_index: int, cpus: list[int], duration: int) -> dict[int, float]:
+            logger.info("search round %d, benchmarking %d CPUs for %ds", round_index + 1, len(cpus), duration)
+            search_directory = os.path.join(session_directory, "rounds", str(round_index))
+            os.makedirs(search_directory, exist_ok=True)
+
+            # the reports of each round are kept separately so that the reports of earlier rounds are not overwritten
+            if config.getboolean("xperf", "enabled"):
+                os.makedirs(round_directory(xperf_directory, round_index), exist_ok=True)
+
+            for cpu in cpus:
+                run(
+                    cpu,
+                    duration,
+                    os.path.join(search_directory, f"CPU-{cpu}.csv"),
+                    os.path.join(round_directory(xperf_directory, round_index), f"CPU-{cpu}"),
+                )
+
+            return {cpu: analyze_csv(os.path.join(search_directory, f"CPU-{cpu}.csv"))[0][key_metric] for cpu in cpus}
+
+        last_round = successive_halving(benchmark_cpus, search_schedule, run_round)
+
+        # the reports may still be generating in the background
+        if benchmark.post_processor is not None:
+            benchmark.post_processor.close()
+
+        # the longest capture of each CPU and its report are the ones that are displayed
+        for cpu, round_index in last_round.items():
+            shutil.copyfile(
+                os.path.join(session_directory, "rounds", str(round_index), f"CPU-{cpu}.csv"),
+                os.path.join(csv_directory, f"CPU-{cpu}.csv"),
+            )
+
+            report_path = os.path.join(round_directory(xperf_directory, round_index), f"CPU-{cpu}.txt")
+
+            # the report is missing if it was still generating when a resumed session was interrupted
+            if os.path.exists(report_path):
+                shutil.copyfile(report_path, os.path.join(xperf_directory, f"CPU-{cpu}.txt"))
+    elif (num_rounds := config.getint("rounds", "count", fallback=1)) > 1:
+        # every cpu is benchmarked once per round in a different order
+        seed = config.get("rounds", "seed", fallback="").strip()
+
+        try:
+            orders = round_orders(
+                benchmark_cpus,
+                num_rounds,
+                config.get("rounds", "order", fallback="latin"),
+                int(seed) if seed else None,
+            )
+        except ValueError as e:
+            raise SessionError(str(e)) from e
+
+        # a resumed session continues with the order of the cpus that was planned
+        if journal is not None:
+            orders = journal.plan(orders)
+
+        for round_index, cpus in enumerate(orders):
+            logger.info("round %d of %d", round_index + 1, num_rounds)
+            os.makedirs(round_directory(csv_directory, round_index), exist_ok=True)
+
+            if config.getboolean("xperf", "enabled"):
+                os.makedirs(round_directory(xperf_directory, round_index), exist_ok=True)
+
+            for cpu in cpus:
+                run(
+                    cpu,
+                    config.getint("settings", "benchmark_duration"),
+                    os.path.join(round_directory(csv_directory, round_index), f"CPU-{cpu}.csv"),
+                    os.path.join(round_directory(xperf_directory, round_index), f"CPU-{cpu}"),
+                )
+    else:
+        for cpu in benchmark_cpus:
+            run(
+                cpu,
+                config.getint("settings", "benchmark_duration"),
+                os.path.join(csv_directory, f"CPU-{cpu}.csv"),
+                os.path.join(xperf_directory, f"CPU-{cpu}"),
+            )
+
+    if benchmark.post_processor is not None:
+        benchmark.post_processor.close()
+
+    if journal is not None:
+        journal.finish()
+
+    if benchmark.warmups:
+        with open(os.path.join(session_directory, "warmup.json"), "w", encoding="utf-8") as file:
+            json.dump({str(cpu): warmup for cpu, warmup in benchmark.warmups.items()}, file)
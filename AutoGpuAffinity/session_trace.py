@@ -0,0 +1,107 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# phases whose duration is configured rather than being overhead of the session
+CONFIGURED_PHASES = ("cache", "warm-up", "capture")
+
+
+class PhaseTracer:
+    # records the duration of each phase of a session as complete events of the chrome trace event format
+    # the trace can be viewed in chrome://tracing or https://ui.perfetto.dev
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.origin = clock()
+        self.events: list[dict[str, Any]] = []
+        self.thread_ids: dict[int, int] = {}
+        self.lock = threading.Lock()
+
+    def _thread_id(self) -> int:
+        # small stable ids so that each thread is shown as its own track
+        return self.thread_ids.setdefault(threading.get_ident(), len(self.thread_ids))
+
+    @contextmanager
+    def phase(self, name: str, **args: Any) -> Iterator[None]:
+        start = self.clock()
+        try:
+            yield
+        finally:
+            end = self.clock()
+            with self.lock:
+                self.events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": (start - self.origin) * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": 1,
+                        "tid": self._thread_id(),
+                        "args": args,
+                    },
+                )
+
+    def summary(self) -> dict[str, tuple[int, float]]:
+        # number of occurrences and total seconds of each phase in order of first occurrence
+        totals: dict[str, tuple[int, float]] = {}
+
+        for event in self.events:
+            count, total = totals.get(event["name"], (0, 0.0))
+            totals[event["name"]] = (count + 1, total + event["dur"] / 1e6)
+
+        return totals
+
+    def print_summary(self) -> None:
+        print(f"{'Phase':<20}{'Count':<8}{'Total':<12}{'Mean':<12}")
+
+        for name, (count, total) in self.summary().items():
+            print(f"{name:<20}{count:<8}{f'{total:.2f}s':<12}{f'{total / count:.2f}s':<12}")
+
+        print()  # new line
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+
+
+def trace_path(session_directory: str) -> str:
+    # a resumed session writes its trace to a separate file rather than overwriting the trace of the interrupted attempt
+    path = os.path.join(session_directory, "trace.json")
+    attempt = 0
+
+    while os.path.exists(path):
+        attempt += 1
+        path = os.path.join(session_directory, f"trace-resume-{attempt}.json")
+
+    return path
+
+
+def measured_capture_overhead(captures_directory: str, max_sessions: int = 5) -> float | None:
+    # mean overhead in seconds per capture of the most recent sessions that have a trace
+    trace_paths = sorted(
+        glob.glob(os.path.join(captures_directory, "*", "trace.json")),
+        key=os.path.getmtime,
+        reverse=True,
+    )[:max_sessions]
+
+    overhead = 0.0
+    num_captures = 0
+
+    for path in trace_paths:
+        try:
+            with open(path, encoding="utf-8") as file:
+                events: list[dict[str, Any]] = json.load(file)["traceEvents"]
+        except (OSError, KeyError, json.JSONDecodeError):
+            continue
+
+        # only phases of the main thread as background work overlaps with the next capture
+        main_events = [event for event in events if event.get("tid") == 0 and "cpu" in event.get("args", {})]
+        num_captures += sum(1 for event in main_events if event["name"] == "capture")
+        overhead += sum(event["dur"] for event in main_events if event["name"] not in CONFIGURED_PHASES) / 1e6
+
+    return overhead / num_captures if num_captures > 0 else None
@@ -0,0 +1,395 @@
+import argparse
+import datetime
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from configparser import ConfigParser
+
+import numpy as np
+import numpy.typing as npt
+from journal import SessionJournal
+from pipeline import PostProcessor
+from processor_groups import GROUP_SIZE, available_cpus, cpu_label
+from results import display_results, supports_color
+from search import halving_schedule
+from session import Benchmark, SessionError, run_session, validate_config
+from session_trace import PhaseTracer, trace_path
+from synthetic import PRESENTMON_COLUMNS, write_presentmon_rows
+
+# simulated backend that produces realistic frametimes per CPU on a simulated clock so that the orchestration of a
+# session (scheduling, timing, failure handling) can be run and profiled on any OS without a GPU
+#
+# every wait of the session goes through the simulated clock so a session with many CPUs completes in seconds and the
+# wall time of the session is the overhead of the orchestration and analysis
+
+logger = logging.getLogger("CLI")
+
+
+class SimulatedClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(seconds, 0.0)
+
+
+class CpuProfile:
+    # frametime characteristics of the subject when the graphics driver is serviced by a CPU
+    def __init__(self, cpu: int, seed: int = 0, mean: float = 4.0) -> None:
+        rng = np.random.default_rng((seed, cpu))
+
+        # CPU 0 services most interrupts by default so it is slower than the rest
+        self.mean = mean * (1 + abs(rng.normal(0, 0.03)) + (0.08 if cpu == 0 else 0.0))
+        self.jitter = 0.03 + abs(rng.normal(0, 0.02))
+        self.stutter_probability = abs(rng.normal(0, 0.001))
+        self.stutter_magnitude = 4 + abs(rng.normal(0, 2))
+        # frametimes decay from warmup_factor times the mean after the subject is launched
+        self.warmup_factor = 2 + abs(rng.normal(0, 1))
+        self.warmup_tau = 1 + abs(rng.normal(0, 1.5))
+
+    def frametimes(
+        self,
+        rng: np.random.Generator,
+        num_frames: int,
+        since_launch: float,
+    ) -> npt.NDArray[np.float64]:
+        # since_launch is the time of the first frame relative to the launch of the subject in seconds
+        base = np.abs(rng.normal(self.mean, self.mean * self.jitter, num_frames))
+        base[rng.random(num_frames) < self.stutter_probability] *= self.stutter_magnitude
+
+        starts = since_launch + (np.cumsum(base) - base) / 1000
+        return base * (1 + (self.warmup_factor - 1) * np.exp(-starts / self.warmup_tau))
+
+
+class SimulatedCapture:
+    def __init__(
+        self,
+        clock: SimulatedClock,
+        csv_path: str,
+        duration: float,
+        profile: CpuProfile,
+        rng: np.random.Generator,
+        since_launch: float,
+        failed: bool = False,
+        drift: float = 0.0,
+    ) -> None:
+        self.clock = clock
+        self.csv_path = csv_path
+        self.profile = profile
+        self.rng = rng
+        self.start = clock.monotonic()
+        self.end = self.start + duration
+        self.since_launch = since_launch
+        # frametimes increase by drift percent per minute of the session e.g. thermal soak
+        self.drift = drift
+        # time up to which frames have been written relative to the start of the capture
+        self.written = 0.0
+        self.stopped = failed
+
+        if not failed:
+            with open(csv_path, "w", encoding="utf-8", newline="") as file:
+                file.write(",".join(PRESENTMON_COLUMNS) + "\n")
+
+    def flush(self) -> None:
+        # write the frames that have been presented up to the current time
+        if self.stopped:
+            return
+
+        until = min(self.clock.monotonic(), self.end) - self.start
+        if until <= self.written:
+            return
+
+        num_frames = math.ceil((until - self.written) * 1000 / self.profile.mean * 1.5) + 1
+        frametimes = self.profile.frametimes(self.rng, num_frames, self.since_launch + self.written)
+        session_times = self.start + self.written + (np.cumsum(frametimes) - frametimes) / 1000
+        frametimes *= 1 + self.drift / 100 * session_times / 60
+        frametimes = frametimes[: np.searchsorted(np.cumsum(frametimes) / 1000, until - self.written, side="right")]
+
+        with open(self.csv_path, "a", encoding="utf-8", newline="") as file:
+            write_presentmon_rows(file, frametimes, self.written)
+
+        # a frame that would end after until is presented in a later flush
+        self.written += float(np.sum(frametimes)) / 1000
+
+    def running(self) -> bool:
+        self.flush()
+        return not self.stopped and self.clock.monotonic() < self.end
+
+    def wait(self) -> None:
+        self.clock.sleep(self.end - self.clock.monotonic())
+        self.stop()
+
+    def stop(self) -> None:
+        self.flush()
+        self.stopped = True
+
+
+class SimulatedBackend:
+    def __init__(
+        self,
+        seed: int = 0,
+        restart_delay: float = 3.0,
+        launch_delay: float = 1.5,
+        failure_rate: float = 0.0,
+        drift: float = 0.0,
+        crash_after: int | None = None,
+    ) -> None:
+        self.clock = SimulatedClock()
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.restart_delay = restart_delay
+        self.launch_delay = launch_delay
+        self.failure_rate = failure_rate
+        self.drift = drift
+        # number of affinity changes before the simulated system stops e.g. a reboot or a power loss
+        self.crash_after = crash_after
+        # simulated registry value, None implies no affinity policy
+        self.affinity: int | None = None
+        self.restarted_at = -math.inf
+        self.launched_at: float | None = None
+        self.profiles: dict[int, CpuProfile] = {}
+
+    def profile(self) -> CpuProfile:
+        # the driver is serviced by CPU 0 if no affinity policy is set
+        cpu = self.affinity if self.affinity is not None else 0
+        return self.profiles.setdefault(cpu, CpuProfile(cpu, self.seed))
+
+    def apply_affinity(self, cpu: int) -> None:
+        if self.crash_after is not None:
+            if self.crash_after == 0:
+                raise SessionError("simulated system stopped")
+
+            self.crash_after -= 1
+
+        self.affinity = cpu
+        self.restarted_at = self.clock.monotonic()
+
+    def reset_affinity(self) -> None:
+        self.affinity = None
+        self.restarted_at = self.clock.monotonic()
+
+    def driver_ready(self) -> bool:
+        return self.clock.monotonic() - self.restarted_at >= self.restart_delay
+
+    def load_profile(self, profile: int) -> None:
+        self.clock.sleep(1)
+
+    def launch_subject(self, cpu: int | None) -> None:
+        self.launched_at = self.clock.monotonic()
+
+    def subject_ready(self) -> bool:
+        return self.launched_at is not None and self.clock.monotonic() - self.launched_at >= self.launch_delay
+
+    def start_capture(self, csv_path: str, duration: float) -> SimulatedCapture:
+        launched_at = self.launched_at if self.launched_at is not None else self.clock.monotonic()
+
+        return SimulatedCapture(
+            self.clock,
+            csv_path,
+            duration,
+            self.profile(),
+            self.rng,
+            self.clock.monotonic() - launched_at,
+            # e.g. PresentMon failing to start the trace session
+            failed=self.rng.random() < self.failure_rate,
+            drift=self.drift,
+        )
+
+    def start_trace(self) -> None:
+        pass
+
+    def stop_trace(self, etl_path: str) -> None:
+        with open(etl_path, "wb"):
+            pass
+
+    def generate_report(self, etl_path: str, report_path: str, save_etl: bool) -> None:
+        # report in the format of xperf -a dpcisr with latencies that depend on the CPU
+        profile = self.profile()
+        buckets = [1, 2, 4, 8, 16, 32, 64, 128]
+        lines: list[str] = []
+
+        for kind in ("DPC", "ISR"):
+            counts = self.rng.poisson(20000 * np.exp(-np.arange(len(buckets)) * (2.5 - profile.jitter * 10)))
+            lines.extend(
+                [
+                    f"{kind} Info",
+                    f"Total = {int(counts.sum())} for module simulated.sys",
+                    *(
+                        f"Elapsed Time, > {lower:>8} usecs AND <= {upper:>8} usecs, {count:>9}, or {100 * count / max(counts.sum(), 1):6.2f}%"
+                        for lower, upper, count in zip([0, *buckets[:-1]], buckets, counts)
+                    ),
+                    "",
+                ],
+            )
+
+        with open(report_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines))
+
+        if not save_etl:
+            os.remove(etl_path)
+
+    def kill_processes(self) -> None:
+        self.launched_at = None
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(format="[%(name)s] %(levelname)s: %(message)s", level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="run a session against a simulated GPU and driver on any OS")
+    parser.add_argument("--config", metavar="<config>", type=str, help="path to config file")
+    parser.add_argument("--cpus", type=int, default=64, help="number of simulated CPUs")
+    parser.add_argument(
+        "--groups",
+        type=int,
+        help="number of processor groups that the CPUs are evenly divided into (fewest possible if not specified)",
+    )
+    parser.add_argument("--output", type=str, help="directory to store the session in (temporary if not specified)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability of each capture failing")
+    parser.add_argument(
+        "--drift",
+        type=float,
+        default=0.0,
+        help="percentage that frametimes increase by per minute of the session e.g. thermal soak",
+    )
+    parser.add_argument(
+        "--crash-after",
+        type=int,
+        help="stop the session after this many affinity changes as if the system rebooted, resume it with --resume",
+    )
+    parser.add_argument("--resume", metavar="<session>", type=str, help="resume an interrupted simulated session")
+    args = parser.parse_args(argv)
+
+    config_path = args.config or os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.ini")
+
+    # ConfigParser.read silently ignores missing files
+    if not os.path.exists(config_path):
+        logger.error("config file not found")
+        return 1
+
+    config = ConfigParser(delimiters="=")
+    config.read(config_path)
+
+    journal: SessionJournal | None = None
+
+    if args.resume:
+        journal = SessionJournal(args.resume)
+
+        if journal.find("start") is None or journal.find("finish") is not None:
+            logger.error("no interrupted session found in %s", args.resume)
+            return 1
+
+        # the results store path of the simulated session is part of the config snapshot
+        config = journal.config()
+
+    output = args.output or tempfile.mkdtemp(prefix="AutoGpuAffinity-")
+    session_directory = args.resume or os.path.join(output, f"AutoGpuAffinity-{time.strftime('%d%m%y%H%M%S')}")
+
+    # keep simulated sessions out of the results of real sessions
+    if config.has_section("results store") and journal is None:
+        config.set("results store", "path", os.path.join(output, "results.db"))
+
+    # windows divides the CPUs evenly into the fewest groups of at most 64 CPUs
+    num_groups = args.groups or -(-args.cpus // GROUP_SIZE)
+    group_sizes = [args.cpus // num_groups + (group < args.cpus % num_groups) for group in range(num_groups)]
+
+    if max(group_sizes) > GROUP_SIZE:
+        logger.error("processor groups can not have more than %d CPUs", GROUP_SIZE)
+        return 1
+
+    try:
+        validate_config(config)
+    except SessionError as e:
+        logger.error(e)
+        return 1
+
+    benchmark_cpus = available_cpus(group_sizes)
+    search_schedule = [(len(benchmark_cpus), config.getint("settings", "benchmark_duration"))]
+
+    if journal is not None:
+        start_entry = journal.find("start") or {}
+        benchmark_cpus = start_entry["cpus"]
+        search_schedule = [(num_cpus, duration) for num_cpus, duration in start_entry["search_schedule"]]
+    elif config.getboolean("search", "enabled", fallback=False):
+        try:
+            search_schedule = halving_schedule(
+                len(benchmark_cpus),
+                config.getint("search", "screening_duration"),
+                config.getint("settings", "benchmark_duration"),
+                config.getint("search", "eta"),
+                config.getint("search", "time_budget") * 60,
+            )
+        except ValueError as e:
+            logger.error(e)
+            return 1
+
+    os.makedirs(os.path.join(session_directory, "CSVs"), exist_ok=True)
+    if config.getboolean("xperf", "enabled"):
+        os.makedirs(os.path.join(session_directory, "xperf"), exist_ok=True)
+
+    if journal is None:
+        with open(os.path.join(session_directory, "session.json"), "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "subject": "simulated",
+                    "config": {section: dict(config[section]) for section in config.sections()},
+                },
+                file,
+                indent=4,
+            )
+
+        journal = SessionJournal(session_directory)
+        journal.start(config, benchmark_cpus, search_schedule)
+    else:
+        for entry in journal.interrupted():
+            logger.info("CPU %s was interrupted and will be benchmarked again", cpu_label(entry["cpu"]))
+
+    backend = SimulatedBackend(args.seed, failure_rate=args.failure_rate, drift=args.drift, crash_after=args.crash_after)
+    post_processor = PostProcessor() if config.getboolean("settings", "background_processing", fallback=False) else None
+    tracer = PhaseTracer()
+    benchmark = Benchmark(config, backend, post_processor, tracer)
+
+    start = time.perf_counter()
+
+    try:
+        run_session(config, benchmark, session_directory, benchmark_cpus, search_schedule, journal)
+    except SessionError as e:
+        logger.error(e)
+        logger.info("resume the session with --resume %s", session_directory)
+        return 1
+    finally:
+        backend.reset_affinity()
+
+        # the trace is written however the session ended so that the phases that led to an error can be inspected
+        try:
+            tracer.write(trace_path(session_directory))
+        except OSError as e:
+            logger.warning("unable to write the trace. %s", e)
+
+    wall_time = time.perf_counter() - start
+
+    logger.info("session stored in %s", session_directory)
+    logger.info(
+        "simulated %s of benchmarking in %.2fs (%.1fms of orchestration per CPU)",
+        datetime.timedelta(seconds=round(backend.clock.monotonic())),
+        wall_time,
+        wall_time / max(len(benchmark_cpus), 1) * 1000,
+    )
+
+    print()
+    tracer.print_summary()
+    display_results(os.path.join(session_directory, "CSVs"), supports_color(), config)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import math
+from typing import Self
+
+import numpy as np
+import numpy.typing as npt
+from compute_frametimes import LATENCY_PERCENTILES, METRIC_VALUES
+
+# logarithmic bucket sketch (DDSketch style)
+#
+# each frametime x > 0 is counted in bucket ceil(log_gamma(x)) where gamma = (1 + a) / (1 - a) and a is the
+# relative accuracy. every value in a bucket is within a relative error of a of the bucket's representative value
+# so any percentile or % low is reported with a frametime that is within a relative error of a of the exact one,
+# which bounds the relative error of the reported FPS to a / (1 - a). the running sum of frametimes is kept per
+# bucket so that % lows thresholds are resolved against the exact total. max, avg, min and stdev are exact.
+#
+# memory is proportional to log(max frametime / min frametime) / a rather than to the number of frames, and
+# sketches created with the same relative accuracy can be merged (e.g. sketches of separate chunks or runs)
+
+
+class FrametimeSketch:
+    def __init__(self, relative_accuracy: float = 0.001) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+
+        # bucket i is stored at position i - offset
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sums = np.zeros(0, dtype=np.float64)
+        self.zero_count = 0
+
+        # exact statistics
+        self.length = 0
+        self.total = 0.0
+        self.min_frametime = math.inf
+        self.max_frametime = -math.inf
+
+        # running mean and sum of squared deviations of the FPS of each frame (Welford/Chan)
+        self.fps_mean = 0.0
+        self.fps_m2 = 0.0
+
+    def _ensure_range(self, lowest: int, highest: int) -> None:
+        if len(self.counts) == 0:
+            self.offset = lowest
+            self.counts = np.zeros(highest - lowest + 1, dtype=np.int64)
+            self.sums = np.zeros(highest - lowest + 1, dtype=np.float64)
+            return
+
+        new_offset = min(self.offset, lowest)
+        new_length = max(self.offset + len(self.counts), highest + 1) - new_offset
+
+        if new_offset == self.offset and new_length == len(self.counts):
+            return
+
+        counts = np.zeros(new_length, dtype=np.int64)
+        sums = np.zeros(new_length, dtype=np.float64)
+        start = self.offset - new_offset
+        counts[start : start + len(self.counts)] = self.counts
+        sums[start : start + len(self.sums)] = self.sums
+
+        self.offset, self.counts, self.sums = new_offset, counts, sums
+
+    def _merge_moments(self, length: int, total: float, fps_mean: float, fps_m2: float) -> None:
+        combined_length = self.length + length
+        delta = fps_mean - self.fps_mean
+
+        self.fps_mean += delta * length / combined_length
+        self.fps_m2 += fps_m2 + delta**2 * self.length * length / combined_length
+        self.length = combined_length
+        self.total += total
+
+    def update(self, frametimes: npt.ArrayLike) -> None:
+        frametimes = np.asarray(frametimes, dtype=np.float64)
+        if len(frametimes) == 0:
+            return
+
+        self.min_frametime = min(self.min_frametime, float(frametimes.min()))
+        self.max_frametime = max(self.max_frametime, float(frametimes.max()))
+
+        with np.errstate(divide="ignore"):
+            fps = 1000 / frametimes
+
+        self._merge_moments(
+            len(frametimes),
+            float(frametimes.sum()),
+            float(fps.mean()),
+            float(((fps - fps.mean()) ** 2).sum()),
+        )
+
+        positive = frametimes[frametimes > 0]
+        self.zero_count += len(frametimes) - len(positive)
+
+        if len(positive) == 0:
+            return
+
+        indices = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+        lowest, highest = int(indices.min()), int(indices.max())
+        self._ensure_range(lowest, highest)
+
+        positions = indices - self.offset
+        self.counts += np.bincount(positions, minlength=len(self.counts))
+        self.sums += np.bincount(positions, weights=positive, minlength=len(self.sums))
+
+    def merge(self, other: Self) -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("unable to merge sketches with different relative accuracies")
+
+        if other.length == 0:
+            return
+
+        self.min_frametime = min(self.min_frametime, other.min_frametime)
+        self.max_frametime = max(self.max_frametime, other.max_frametime)
+        self._merge_moments(other.length, other.total, other.fps_mean, other.fps_m2)
+        self.zero_count += other.zero_count
+
+        if len(other.counts) > 0:
+            self._ensure_range(other.offset, other.offset + len(other.counts) - 1)
+            start = other.offset - self.offset
+            self.counts[start : start + len(other.counts)] += other.counts
+            self.sums[start : start + len(other.sums)] += other.sums
+
+    def _bucket_values(self, positions: npt.NDArray[np.intp]) -> npt.NDArray[np.float64]:
+        # representative value of each bucket which minimizes the relative error
+        return 2 * self.gamma ** (positions + self.offset) / (self.gamma + 1)
+
+    def percentiles(self, values: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        # rank of the frame in descending order, matches compute_frametimes.percentiles
+        ranks = np.ceil(np.asarray(values, dtype=np.float64) / 100 * self.length)
+
+        # walk buckets from the slowest frametime
+        descending_counts = np.cumsum(self.counts[::-1])
+        positions = len(self.counts) - 1 - np.searchsorted(descending_counts, ranks, side="left")
+
+        frametimes = np.zeros(len(ranks), dtype=np.float64)
+        in_buckets = positions >= 0
+        frametimes[in_buckets] = self._bucket_values(positions[in_buckets])
+
+        with np.errstate(divide="ignore"):
+            return 1000 / frametimes
+
+    def lows(self, values: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        thresholds = np.asarray(values, dtype=np.float64) / 100 * self.total
+
+        descending_sums = np.cumsum(self.sums[::-1])
+        indices = np.searchsorted(descending_sums, thresholds, side="left")
+        found = indices < len(self.sums)
+
+        results = np.zeros(len(indices), dtype=np.float64)
+        results[found] = 1000 / self._bucket_values(len(self.sums) - 1 - indices[found])
+        return results
+
+    def latency_metrics(self, percentile_values: tuple[float, ...] = LATENCY_PERCENTILES) -> dict[str, float]:
+        # the values are latencies rather than frametimes, matches compute_frametimes.latency_metrics
+        with np.errstate(divide="ignore"):
+            latencies = 1000 / self.percentiles([100 - value for value in percentile_values])
+
+        return {
+            "average": self.total / self.length,
+            **{f"percentile{value}": float(result) for value, result in zip(percentile_values, latencies)},
+            "maximum": self.max_frametime,
+        }
+
+    def metrics(self, metric_values: tuple[float, ...] = METRIC_VALUES) -> dict[str, float]:
+        mean = 1000 / (self.total / self.length)
+
+        # sum of squared deviations from the frametime based mean rather than the mean of the FPS values
+        squared_deviations = self.fps_m2 + self.length * (self.fps_mean - mean) ** 2
+        stdev = math.sqrt(squared_deviations / (self.length - 1)) if self.length > 1 else 0.0
+
+        return {
+            "maximum": 1000 / self.min_frametime if self.min_frametime > 0 else math.inf,
+            "average": mean,
+            "minimum": 1000 / self.max_frametime,
+            "stdev": stdev,
+            "duration": self.total / 1000,
+            **{
+                f"percentile{value}": float(result)
+                for value, result in zip(metric_values, self.percentiles(metric_values))
+            },
+            **{f"lows{value}": float(result) for value, result in zip(metric_values, self.lows(metric_values))},
+        }
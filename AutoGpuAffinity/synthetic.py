@@ -0,0 +1,108 @@
+from typing import TextIO
+
+import numpy as np
+import numpy.typing as npt
+
+# seeded frametime generators that mimic common capture shapes for benchmarks and dry runs
+
+PRESENTMON_COLUMNS = (
+    "Application",
+    "ProcessID",
+    "SwapChainAddress",
+    "Runtime",
+    "SyncInterval",
+    "PresentFlags",
+    "AllowsTearing",
+    "PresentMode",
+    "Dropped",
+    "TimeInSeconds",
+    "msInPresentAPI",
+    "msBetweenPresents",
+    "msUntilRenderComplete",
+    "msUntilDisplayed",
+)
+
+
+def steady(num_frames: int, seed: int = 0, mean: float = 4.0, jitter: float = 0.05) -> npt.NDArray[np.float64]:
+    rng = np.random.default_rng(seed)
+    return np.abs(rng.normal(mean, mean * jitter, num_frames))
+
+
+def stutter(
+    num_frames: int,
+    seed: int = 0,
+    mean: float = 4.0,
+    period: int = 500,
+    magnitude: float = 8.0,
+) -> npt.NDArray[np.float64]:
+    # a hitch every period frames
+    frametimes = steady(num_frames, seed, mean)
+    frametimes[period - 1 :: period] *= magnitude
+    return frametimes
+
+
+def spikes(num_frames: int, seed: int = 0, mean: float = 4.0, shape: float = 2.5) -> npt.NDArray[np.float64]:
+    # pareto distributed tail, most frames are close to the mean and rare frames are many times slower
+    rng = np.random.default_rng(seed)
+    return mean * 0.8 + rng.pareto(shape, num_frames) * mean * 0.3
+
+
+def warmup(
+    num_frames: int,
+    seed: int = 0,
+    mean: float = 4.0,
+    warmup_frames: int = 2000,
+    warmup_factor: float = 3.0,
+) -> npt.NDArray[np.float64]:
+    # frametimes decay from warmup_factor times the mean while caches are built
+    frametimes = steady(num_frames, seed, mean)
+    decay = np.exp(-np.arange(num_frames) / max(warmup_frames / 5, 1))
+    return frametimes * (1 + (warmup_factor - 1) * decay)
+
+
+GENERATORS = {
+    "steady": steady,
+    "stutter": stutter,
+    "spikes": spikes,
+    "warmup": warmup,
+}
+
+
+def write_presentmon_rows(
+    file: TextIO,
+    frametimes: npt.NDArray[np.float64],
+    start_time: float = 0.0,
+    application: str = "lava-triangle.exe",
+) -> None:
+    # writes the rows of PresentMon 1.10.0, latency columns are derived from the frametimes
+    # start_time is the TimeInSeconds of the frame preceding the first frame
+    columns = np.column_stack(
+        (
+            start_time + np.cumsum(frametimes) / 1000,
+            frametimes * 0.05,
+            frametimes,
+            frametimes * 0.8,
+            frametimes * 1.5,
+        ),
+    )
+    np.savetxt(
+        file,
+        columns,
+        fmt=f"{application},1000,0x0000000000000001,DXGI,0,0,1,Hardware: Independent Flip,0,%.6f,%.4f,%.4f,%.4f,%.4f",
+    )
+
+
+def write_presentmon_csv(
+    path: str,
+    frametimes: npt.NDArray[np.float64],
+    application: str = "lava-triangle.exe",
+    chunk_size: int = 1_000_000,
+) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.write(",".join(PRESENTMON_COLUMNS) + "\n")
+
+        start_time = 0.0
+        for start in range(0, len(frametimes), chunk_size):
+            chunk = frametimes[start : start + chunk_size]
+            write_presentmon_rows(file, chunk, start_time, application)
+            start_time += float(np.sum(chunk)) / 1000
@@ -0,0 +1,89 @@
+import numpy as np
+import numpy.typing as npt
+
+# rolling window analysis of a capture so that a burst of hitches is distinguishable from evenly spread jitter
+#
+# frames are assigned to fixed windows by the time at which they start and the frames of each window are sorted once
+# the sort is bounded to chunks of whole windows so the work grows linearly with the number of frames
+
+
+def window_ids(frametimes: npt.NDArray[np.float64], window: float) -> npt.NDArray[np.int64]:
+    # index of the window of each frame, window is in seconds
+    starts = np.cumsum(frametimes) - frametimes
+    return (starts // (window * 1000)).astype(np.int64)
+
+
+def analyze_windows(
+    frametimes: npt.NDArray[np.float64],
+    ids: npt.NDArray[np.int64],
+    low: float,
+    stutter_factor: float,
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.bool_]]:
+    # returns the id, average and lows of each window and whether each frame is a stutter
+    # descending frametimes within each window, ids are already in ascending order so a single key sorts both
+    relative_ids = (ids - ids[0]).astype(np.float64)
+    sorted_frametimes = frametimes[np.argsort(relative_ids * (2 * frametimes.max() + 1) - frametimes)]
+
+    offsets = np.flatnonzero(np.diff(ids, prepend=ids[0] - 1))
+    unique_ids = ids[offsets]
+    counts = np.diff(offsets, append=len(ids))
+    cumulative = np.cumsum(sorted_frametimes)
+    preceding = np.concatenate(([0.0], cumulative[offsets[1:] - 1]))
+    totals = cumulative[offsets + counts - 1] - preceding
+
+    # first frame of each window where the running total of the window reaches the threshold
+    indices = np.searchsorted(cumulative, preceding + low / 100 * totals, side="left")
+    indices = np.minimum(indices, offsets + counts - 1)
+
+    # a stutter is a frame that is much slower than the median of its window
+    medians = sorted_frametimes[offsets + counts // 2]
+    stutters = frametimes > stutter_factor * np.repeat(medians, counts)
+
+    return unique_ids, 1000 * counts / totals, 1000 / sorted_frametimes[indices], stutters
+
+
+def rolling_metrics(
+    frametimes: npt.ArrayLike,
+    window: float = 1.0,
+    low: float = 1.0,
+    stutter_factor: float = 2.5,
+    chunk_size: int = 1 << 20,
+) -> dict[str, npt.NDArray[np.float64]]:
+    frametimes = np.asarray(frametimes, dtype=np.float64)
+    ids = window_ids(frametimes, window)
+    starts = (np.cumsum(frametimes) - frametimes) / 1000
+
+    window_chunks: list[tuple[npt.NDArray[np.int64], npt.NDArray[np.float64], npt.NDArray[np.float64]]] = []
+    stutter_chunks: list[npt.NDArray[np.intp]] = []
+
+    begin = 0
+    while begin < len(frametimes):
+        # extend or shorten each chunk to a window boundary
+        end = min(begin + chunk_size, len(frametimes))
+        if end < len(frametimes):
+            end = int(np.searchsorted(ids, ids[end], side="left"))
+            if end == begin:
+                end = int(np.searchsorted(ids, ids[begin], side="right"))
+
+        chunk_ids, average, lows, stutters = analyze_windows(frametimes[begin:end], ids[begin:end], low, stutter_factor)
+        window_chunks.append((chunk_ids, average, lows))
+        stutter_chunks.append(np.flatnonzero(stutters) + begin)
+        begin = end
+
+    stutter_indices = np.concatenate(stutter_chunks) if stutter_chunks else np.empty(0, dtype=np.intp)
+
+    return {
+        # start of each window in seconds, windows without a starting frame are skipped
+        "time": np.concatenate([chunk[0] for chunk in window_chunks]) * window if window_chunks else np.empty(0),
+        "average": np.concatenate([chunk[1] for chunk in window_chunks]) if window_chunks else np.empty(0),
+        "lows": np.concatenate([chunk[2] for chunk in window_chunks]) if window_chunks else np.empty(0),
+        # start of each stutter in seconds and its frametime in milliseconds
+        "stutter_time": starts[stutter_indices],
+        "stutter_duration": frametimes[stutter_indices],
+    }
+
+
+def stutter_summary(timeline: dict[str, npt.NDArray[np.float64]], duration: float) -> dict[str, float]:
+    # number of stutters and stutters per minute
+    count = len(timeline["stutter_time"])
+    return {"stutters": count, "stutter_density": float(count / duration * 60) if duration > 0 else 0.0}
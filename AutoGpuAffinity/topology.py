@@ -0,0 +1,211 @@
+import ctypes
+import os
+import struct
+import sys
+from typing import NamedTuple
+
+# LOGICAL_PROCESSOR_RELATIONSHIP
+RELATION_PROCESSOR_CORE = 0
+RELATION_NUMA_NODE = 1
+RELATION_CACHE = 2
+RELATION_ALL = 0xFFFF
+
+ERROR_INSUFFICIENT_BUFFER = 122
+
+
+class LogicalCpu(NamedTuple):
+    cpu: int
+    # logical CPUs that share a physical core (SMT siblings) have the same core
+    core: int
+    # logical CPUs that share the last level cache (e.g. a CCX) have the same cache domain
+    cache_domain: int
+    # higher values are more performant e.g. P-cores on hybrid CPUs, all CPUs have the same class otherwise
+    efficiency_class: int
+
+
+def mask_to_cpus(mask: int, group: int = 0) -> list[int]:
+    return [group * 64 + bit for bit in range(64) if mask >> bit & 1]
+
+
+def parse_group_masks(data: bytes, offset: int, count: int) -> list[int]:
+    # GROUP_AFFINITY is a KAFFINITY mask followed by the group number and padding
+    cpus: list[int] = []
+
+    for index in range(count):
+        mask, group = struct.unpack_from("<QH", data, offset + index * 16)
+        cpus.extend(mask_to_cpus(mask, group))
+
+    return cpus
+
+
+def parse_processor_information(data: bytes) -> list[LogicalCpu]:
+    # parses the buffer returned by GetLogicalProcessorInformationEx(RelationAll)
+    cores: list[tuple[list[int], int]] = []
+    caches: list[tuple[int, list[int]]] = []
+    offset = 0
+
+    while offset < len(data):
+        relationship, size = struct.unpack_from("<II", data, offset)
+        body = offset + 8
+
+        if relationship == RELATION_PROCESSOR_CORE:
+            # PROCESSOR_RELATIONSHIP: Flags, EfficiencyClass, Reserved[20], GroupCount, GroupMask[]
+            _, efficiency_class = struct.unpack_from("<BB", data, body)
+            (group_count,) = struct.unpack_from("<H", data, body + 22)
+            cores.append((parse_group_masks(data, body + 24, group_count), efficiency_class))
+        elif relationship == RELATION_CACHE:
+            # CACHE_RELATIONSHIP: Level, Associativity, LineSize, CacheSize, Type, Reserved[18], GroupCount, GroupMask[]
+            (level,) = struct.unpack_from("<B", data, body)
+            (group_count,) = struct.unpack_from("<H", data, body + 30)
+            caches.append((level, parse_group_masks(data, body + 32, max(group_count, 1))))
+
+        offset += size
+
+    last_level = max((level for level, _ in caches), default=0)
+    cache_domains: dict[int, int] = {}
+
+    for level, cpus in caches:
+        if level == last_level:
+            for cpu in cpus:
+                cache_domains[cpu] = min(cpus)
+
+    return sorted(
+        LogicalCpu(cpu, core_index, cache_domains.get(cpu, 0), efficiency_class)
+        for core_index, (cpus, efficiency_class) in enumerate(cores)
+        for cpu in cpus
+    )
+
+
+def parse_numa_nodes(data: bytes) -> dict[int, list[tuple[int, int]]]:
+    # returns the group and KAFFINITY mask of each group of each NUMA node
+    nodes: dict[int, list[tuple[int, int]]] = {}
+    offset = 0
+
+    while offset < len(data):
+        relationship, size = struct.unpack_from("<II", data, offset)
+        body = offset + 8
+
+        if relationship == RELATION_NUMA_NODE:
+            # NUMA_NODE_RELATIONSHIP: NodeNumber, Reserved[18], GroupCount, GroupMask[]
+            # GroupCount is reserved and 0 before Windows Server 2022 which implies a single group
+            (node,) = struct.unpack_from("<I", data, body)
+            (group_count,) = struct.unpack_from("<H", data, body + 22)
+            nodes[node] = [
+                (group, mask)
+                for mask, group in (
+                    struct.unpack_from("<QH", data, body + 24 + index * 16) for index in range(max(group_count, 1))
+                )
+            ]
+
+        offset += size
+
+    return nodes
+
+
+def processor_information() -> bytes:
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    length = ctypes.c_ulong(0)
+
+    kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, None, ctypes.byref(length))
+    if ctypes.get_last_error() != ERROR_INSUFFICIENT_BUFFER:
+        raise ctypes.WinError(ctypes.get_last_error())
+
+    buffer = ctypes.create_string_buffer(length.value)
+    if not kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, buffer, ctypes.byref(length)):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+    return buffer.raw[: length.value]
+
+
+def windows_topology() -> list[LogicalCpu]:
+    return parse_processor_information(processor_information())
+
+
+def windows_numa_nodes() -> dict[int, list[tuple[int, int]]]:
+    return parse_numa_nodes(processor_information())
+
+
+def parse_cpu_list(cpu_list: str) -> list[int]:
+    # e.g. 0-3,8-11
+    cpus: list[int] = []
+
+    for item in cpu_list.strip().split(","):
+        if "-" in item:
+            lower, upper = item.split("-")
+            cpus.extend(range(int(lower), int(upper) + 1))
+        elif item:
+            cpus.append(int(item))
+
+    return cpus
+
+
+def read_sysfs(path: str) -> str | None:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def linux_topology(root: str = "/sys/devices/system/cpu") -> list[LogicalCpu]:
+    cpus = sorted(
+        int(name[3:]) for name in os.listdir(root) if name.startswith("cpu") and name[3:].isdigit()
+    )
+
+    # hybrid Intel CPUs list their P-cores under cpu_core and E-cores under cpu_atom
+    atom_cpus = set(parse_cpu_list(read_sysfs(os.path.join(root, "..", "..", "cpu_atom", "cpus")) or ""))
+
+    topology: list[LogicalCpu] = []
+    cores: dict[tuple[str, str], int] = {}
+
+    for cpu in cpus:
+        cpu_root = os.path.join(root, f"cpu{cpu}")
+        package = read_sysfs(os.path.join(cpu_root, "topology", "physical_package_id")) or "0"
+        core = read_sysfs(os.path.join(cpu_root, "topology", "core_id")) or str(cpu)
+
+        # the highest cache index is the last level cache
+        cache_domain = cpu
+        cache_root = os.path.join(cpu_root, "cache")
+        if os.path.isdir(cache_root):
+            indexes = sorted(name for name in os.listdir(cache_root) if name.startswith("index"))
+            if indexes and (shared := read_sysfs(os.path.join(cache_root, indexes[-1], "shared_cpu_list"))):
+                cache_domain = min(parse_cpu_list(shared))
+
+        # cpu_capacity is reported on heterogeneous ARM systems
+        capacity = read_sysfs(os.path.join(cpu_root, "cpu_capacity"))
+        efficiency_class = int(capacity) if capacity is not None else int(cpu not in atom_cpus)
+
+        topology.append(
+            LogicalCpu(cpu, cores.setdefault((package, core), len(cores)), cache_domain, efficiency_class),
+        )
+
+    return topology
+
+
+def get_topology() -> list[LogicalCpu]:
+    return windows_topology() if sys.platform == "win32" else linux_topology()
+
+
+def representatives(topology: list[LogicalCpu], mode: str, count: int = 1) -> list[int]:
+    # mode is one of:
+    #   none  - every logical CPU
+    #   core  - one logical CPU per physical core (skips SMT siblings)
+    #   cache - count physical cores per cache domain and efficiency class
+    if mode == "none":
+        return [logical_cpu.cpu for logical_cpu in topology]
+
+    first_per_core: dict[int, LogicalCpu] = {}
+    for logical_cpu in sorted(topology):
+        first_per_core.setdefault(logical_cpu.core, logical_cpu)
+
+    if mode == "core":
+        return sorted(logical_cpu.cpu for logical_cpu in first_per_core.values())
+
+    if mode == "cache":
+        groups: dict[tuple[int, int], list[int]] = {}
+        for logical_cpu in sorted(first_per_core.values()):
+            groups.setdefault((logical_cpu.cache_domain, logical_cpu.efficiency_class), []).append(logical_cpu.cpu)
+
+        return sorted(cpu for cpus in groups.values() for cpu in cpus[:count])
+
+    raise ValueError(f"invalid topology mode: {mode}")
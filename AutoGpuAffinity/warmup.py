@@ -0,0 +1,87 @@
+import time
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+from presentmon import FRAMETIME_COLUMN, CsvTail, valid_frametimes
+from timeline import window_ids
+
+# detects the end of the warm-up of the subject (e.g. shader and driver caches being built) from the frametime stream
+#
+# the stream is split into batches of batch_duration seconds and the truncation point is chosen with the MSER rule
+# (marginal standard error rule) which minimizes the standard error of the mean of the remaining batches. the
+# stream is considered stable once the truncation point lies within the first half of the batches and at least
+# min_stable seconds remain after it
+
+
+def batch_means(frametimes: npt.NDArray[np.float64], batch_duration: float) -> npt.NDArray[np.float64]:
+    # mean frametime of each batch, batches without a starting frame are skipped
+    ids = window_ids(frametimes, batch_duration)
+    counts = np.bincount(ids)
+    sums = np.bincount(ids, weights=frametimes)
+    return sums[counts > 0] / counts[counts > 0]
+
+
+def mser(values: npt.NDArray[np.float64]) -> int:
+    # number of leading values to truncate, only the first half of the values are considered
+    num_values = len(values)
+    if num_values < 2:
+        return 0
+
+    # suffix sums so that the statistic of every truncation point is computed in a single pass
+    suffix_sum = np.cumsum(values[::-1])[::-1]
+    suffix_squares = np.cumsum((values**2)[::-1])[::-1]
+    remaining = num_values - np.arange(num_values)
+
+    candidates = num_values // 2 + 1
+    variance = suffix_squares[:candidates] - suffix_sum[:candidates] ** 2 / remaining[:candidates]
+    return int(np.argmin(variance / remaining[:candidates] ** 2))
+
+
+def detect_warmup(
+    frametimes: npt.NDArray[np.float64],
+    batch_duration: float = 0.5,
+    min_stable: float = 5.0,
+) -> float | None:
+    # returns the length of the warm-up in seconds or None if the stream is not stable yet
+    means = batch_means(frametimes, batch_duration)
+    truncation = mser(means)
+
+    # a truncation point near the middle implies that the stream is still drifting
+    if truncation >= len(means) // 2 or (len(means) - truncation) * batch_duration < min_stable:
+        return None
+
+    # batches are consecutive so the warm-up is a whole number of batches
+    return truncation * batch_duration
+
+
+def wait_for_warmup(
+    csv_path: str,
+    is_running: Callable[[], bool],
+    max_duration: float,
+    batch_duration: float = 0.5,
+    min_stable: float = 5.0,
+    poll_interval: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[float, float]:
+    # tails the CSV that is being written until the stream is stable, max_duration elapses or the writer exits
+    # returns the length of the warm-up and the duration that has been captured so far in seconds
+    # durations are measured from the frametimes rather than the wall clock
+    tail = CsvTail(csv_path)
+    chunks: list[npt.NDArray[np.float64]] = []
+    elapsed = 0.0
+
+    while True:
+        running = is_running()
+        chunk = valid_frametimes(tail.read().get(FRAMETIME_COLUMN, np.empty(0, dtype=np.float64)))
+        chunks.append(chunk)
+        elapsed += float(chunk.sum()) / 1000
+
+        if (warmup := detect_warmup(np.concatenate(chunks), batch_duration, min_stable)) is not None:
+            return min(warmup, max_duration), elapsed
+
+        # stop at the upper bound rather than waiting for a subject that never settles
+        if not running or elapsed >= max_duration:
+            return min(elapsed, max_duration), elapsed
+
+        sleep(poll_interval)
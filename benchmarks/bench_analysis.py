@@ -0,0 +1,174 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from configparser import ConfigParser
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from analysis import analyze_cpus  # noqa: E402
+from compute_frametimes import compute_metrics  # noqa: E402
+from presentmon import read_frametimes  # noqa: E402
+from report import cpu_report  # noqa: E402
+from results import display_results  # noqa: E402
+from synthetic import GENERATORS, write_presentmon_csv  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity", "config.ini")
+
+
+def measure(function: Callable[[], Any], repeat: int) -> dict[str, float]:
+    durations: list[float] = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    # peak memory of a separate run as tracing slows down the timed runs
+    # only allocations of this process are traced so worker processes are not included
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": min(durations), "median_seconds": statistics.median(durations), "peak_bytes": peak}
+
+
+def analyze_session(csv_directory: str, config: ConfigParser, cached: bool) -> None:
+    # the full --analyze flow with the table printed to nowhere
+    if not cached:
+        # as if the session is analyzed for the first time
+        for file in os.listdir(csv_directory):
+            if file.endswith((".csv.json", ".csv.npy")):
+                os.remove(os.path.join(csv_directory, file))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        display_results(csv_directory, False, config)
+
+
+def run_benchmarks(sizes: list[int], profiles: list[str], num_cpus: int, repeat: int) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+
+    for profile in profiles:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as session_directory:
+                csv_directory = os.path.join(session_directory, "CSVs")
+                os.makedirs(csv_directory)
+
+                for cpu in range(num_cpus):
+                    frametimes = GENERATORS[profile](size, seed=cpu)
+                    write_presentmon_csv(os.path.join(csv_directory, f"CPU-{cpu}.csv"), frametimes)
+
+                csv_path = os.path.join(csv_directory, "CPU-0.csv")
+                frametimes = read_frametimes(csv_path)
+                cpus = list(range(num_cpus))
+
+                cases: dict[str, tuple[Callable[[], Any], int]] = {
+                    "parse": (lambda: read_frametimes(csv_path), size),
+                    "metrics": (lambda: compute_metrics(frametimes), size),
+                    "report": (lambda: cpu_report(frametimes, 1000, 100), size),
+                    "analyze": (lambda: analyze_cpus(csv_directory, cpus), size * num_cpus),
+                    "analyze_parallel": (lambda: analyze_cpus(csv_directory, cpus, workers=num_cpus), size * num_cpus),
+                    "analyze_streaming": (
+                        lambda: analyze_cpus(csv_directory, cpus, relative_accuracy=0.001),
+                        size * num_cpus,
+                    ),
+                }
+
+                # the first cached run writes the cache so it is populated for the timed runs
+                analyze_cpus(csv_directory, cpus, use_cache=True)
+                cases["analyze_cached"] = (lambda: analyze_cpus(csv_directory, cpus, use_cache=True), size * num_cpus)
+
+                # display_results with the default config including the timeline, report and results store which are
+                # written to the session directory
+                config = ConfigParser(delimiters="=")
+                config.read(CONFIG_PATH)
+                config.set("results store", "path", os.path.join(session_directory, "results.db"))
+                cases["display_results"] = (lambda: analyze_session(csv_directory, config, False), size * num_cpus)
+                cases["display_results_cached"] = (
+                    lambda: analyze_session(csv_directory, config, True),
+                    size * num_cpus,
+                )
+
+                for case, (function, num_frames) in cases.items():
+                    result = measure(function, repeat)
+                    result["frames_per_second"] = num_frames / result["seconds"]
+                    results.append({"profile": profile, "size": size, "case": case, **result})
+
+                    print(
+                        f"{profile:<10}{size:<12}{case:<24}{result['seconds']:<12.4f}"
+                        f"{result['frames_per_second']:<16.0f}{result['peak_bytes'] / 2**20:.1f} MiB",
+                    )
+
+    return results
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {
+            (result["profile"], result["size"], result["case"]): result for result in json.load(file)["results"]
+        }
+
+    print(f"\ncompared to {baseline_path} (speedup > 1 is faster)")
+
+    for result in results:
+        if (previous := baseline.get((result["profile"], result["size"], result["case"]))) is not None:
+            print(
+                f"{result['profile']:<10}{result['size']:<12}{result['case']:<24}"
+                f"{previous['seconds'] / result['seconds']:<12.2f}"
+                f"{result['peak_bytes'] / max(previous['peak_bytes'], 1):.2f}x memory",
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="benchmark the analysis path with synthetic captures")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="frames per CSV")
+    parser.add_argument("--profiles", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--cpus", type=int, default=4, help="number of CSVs for the analyze cases")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--output",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "latest.json"),
+        help="path to store the results",
+    )
+    parser.add_argument("--baseline", help="path of previously stored results to compare against")
+    args = parser.parse_args()
+
+    # display_results logs the paths of the exported files
+    logging.disable(logging.INFO)
+
+    print(f"{'profile':<10}{'frames':<12}{'case':<24}{'seconds':<12}{'frames/s':<16}peak memory")
+    results = run_benchmarks(args.sizes, args.profiles, args.cpus, args.repeat)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+                "results": results,
+            },
+            file,
+            indent=4,
+        )
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
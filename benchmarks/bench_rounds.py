@@ -0,0 +1,95 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from configparser import ConfigParser
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from analysis import analyze_cpus, list_cpus, merge_rounds  # noqa: E402
+from session import Benchmark, run_session  # noqa: E402
+from simulation import CpuProfile, SimulatedBackend  # noqa: E402
+
+# evaluates how well the ranking of a simulated session recovers the true ranking of the CPUs when the frametimes drift
+# over the session, each schedule captures every CPU for the same total duration
+
+
+def simulate(num_cpus: int, seed: int, drift: float, num_rounds: int, order: str, duration: int) -> dict[int, float]:
+    # returns the average fps of each cpu
+    config = ConfigParser(delimiters="=")
+    config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity", "config.ini"))
+    config.set("settings", "benchmark_duration", str(duration))
+    # long enough for the simulated warm-up to decay so that shorter captures per round are not penalized
+    config.set("settings", "cache_duration", "60")
+    config.set("settings", "background_processing", "false")
+    config.set("xperf", "enabled", "false")
+    config.set("rounds", "count", str(num_rounds))
+    config.set("rounds", "order", order)
+    config.set("rounds", "seed", str(seed))
+
+    benchmark = Benchmark(config, SimulatedBackend(seed, drift=drift))
+
+    with tempfile.TemporaryDirectory() as session_directory:
+        csv_directory = os.path.join(session_directory, "CSVs")
+        os.makedirs(csv_directory)
+
+        cpus = list(range(num_cpus))
+        run_session(config, benchmark, session_directory, cpus, [(num_cpus, duration)])
+        merge_rounds(csv_directory)
+        results, _ = analyze_cpus(csv_directory, list_cpus(csv_directory))
+
+    return {cpu: results[str(cpu)]["average"] for cpu in cpus}
+
+
+def rank_correlation(first: list[float], second: list[float]) -> float:
+    # spearman's rank correlation without ties
+    first_ranks = np.argsort(np.argsort(first))
+    second_ranks = np.argsort(np.argsort(second))
+    return float(np.corrcoef(first_ranks, second_ranks)[0, 1])
+
+
+def main() -> int:
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description="evaluate round schedules against simulated sessions with drift")
+    parser.add_argument("--cpus", type=int, default=8)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--drift", type=float, default=1.0, help="percentage that frametimes increase by per minute")
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--duration", type=int, default=10, help="total capture duration of each cpu in seconds")
+    args = parser.parse_args()
+
+    schedules = [
+        ("single", 1, "sequential"),
+        ("sequential", args.rounds, "sequential"),
+        ("random", args.rounds, "random"),
+        ("latin", args.rounds, "latin"),
+    ]
+
+    print(f"{'schedule':<12}{'rounds':<8}{'rank correlation':<18}{'position bias':<14}")
+
+    for name, num_rounds, order in schedules:
+        correlations: list[float] = []
+        biases: list[float] = []
+
+        for seed in range(args.seeds):
+            averages = simulate(args.cpus, seed, args.drift, num_rounds, order, max(args.duration // num_rounds, 1))
+            # higher fps is better and a higher mean frametime is worse
+            expected = [-CpuProfile(cpu, seed).mean for cpu in range(args.cpus)]
+            measured = [averages[cpu] for cpu in range(args.cpus)]
+            correlations.append(rank_correlation(expected, measured))
+
+            # correlation between the error of each cpu and its position in a sequential session, drift biases later cpus
+            errors = np.array(measured) / (1000 / -np.array(expected)) - 1
+            biases.append(float(np.corrcoef(np.arange(args.cpus), errors)[0, 1]))
+
+        print(f"{name:<12}{num_rounds:<8}{float(np.mean(correlations)):<18.3f}{float(np.mean(biases)):<14.3f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from synthetic import steady, warmup  # noqa: E402
+from warmup import detect_warmup  # noqa: E402
+
+
+def expected_warmup(
+    frametimes: np.ndarray,
+    warmup_frames: int,
+    warmup_factor: float,
+    tolerance: float,
+) -> float:
+    # time at which the excess frametime of the synthetic warm-up decays below tolerance of the mean
+    if warmup_frames == 0:
+        return 0.0
+
+    num_frames = math.ceil(warmup_frames / 5 * math.log((warmup_factor - 1) / tolerance))
+    return float(np.sum(frametimes[:num_frames])) / 1000
+
+
+def replay(frametimes: np.ndarray, poll_interval: float, max_duration: float) -> tuple[float, float]:
+    # feeds the frametimes as if they were being captured and returns the detected warm-up and when it was detected
+    starts = np.cumsum(frametimes) / 1000
+    elapsed = poll_interval
+
+    while elapsed < max_duration:
+        captured = frametimes[: np.searchsorted(starts, elapsed, side="right")]
+        if (detected := detect_warmup(captured)) is not None:
+            return detected, elapsed
+
+        elapsed += poll_interval
+
+    return max_duration, max_duration
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="evaluate warm-up detection against synthetic warm-up traces")
+    parser.add_argument("--warmup-frames", type=int, nargs="+", default=[0, 500, 2000, 5000])
+    parser.add_argument("--seeds", type=int, default=10)
+    parser.add_argument("--max-duration", type=float, default=60)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="fraction of the mean that the warm-up decays to")
+    args = parser.parse_args()
+
+    print(f"{'frames':<10}{'expected':<12}{'detected':<12}{'error':<12}{'detected at':<12}")
+
+    for warmup_frames in args.warmup_frames:
+        expected_values: list[float] = []
+        errors: list[float] = []
+        detected_at: list[float] = []
+
+        for seed in range(args.seeds):
+            frametimes = warmup(50_000, seed, warmup_frames=warmup_frames) if warmup_frames > 0 else steady(50_000, seed)
+            expected = expected_warmup(frametimes, warmup_frames, 3.0, args.tolerance)
+            detected, at = replay(frametimes, 1.0, args.max_duration)
+            expected_values.append(expected)
+            errors.append(detected - expected)
+            detected_at.append(at)
+
+        mean_expected = float(np.mean(expected_values))
+        print(
+            f"{warmup_frames:<10}{mean_expected:<12.2f}{mean_expected + float(np.mean(errors)):<12.2f}"
+            f"{float(np.mean(np.abs(errors))):<12.2f}{float(np.mean(detected_at)):<12.2f}",
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+from configparser import ConfigParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from dpcisr import summarize_report  # noqa: E402
+from pipeline import PostProcessor  # noqa: E402
+from session import Benchmark, run_session  # noqa: E402
+from simulation import SimulatedBackend  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity", "config.ini")
+
+
+class XperfStandIn(SimulatedBackend):
+    # the report of a CPU takes until the next CPU has started to be benchmarked, like xperf -a dpcisr on a long ETL
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.condition = threading.Condition()
+        self.events: list[tuple[str, int]] = []
+        self.runs: dict[int, int] = {}
+        self.overlapped: set[int] = set()
+
+    def record(self, event: str, cpu: int) -> None:
+        with self.condition:
+            self.events.append((event, cpu))
+            self.condition.notify_all()
+
+    def apply_affinity(self, cpu: int) -> None:
+        with self.condition:
+            self.runs[cpu] = len(self.runs)
+
+        self.record("apply affinity", cpu)
+        super().apply_affinity(cpu)
+
+    def kill_processes(self) -> None:
+        assert self.affinity is not None
+        self.record("kill processes", self.affinity)
+        super().kill_processes()
+
+    def stop_trace(self, etl_path: str) -> None:
+        assert self.affinity is not None
+        self.record("stop trace", self.affinity)
+        super().stop_trace(etl_path)
+
+    def generate_report(self, etl_path: str, report_path: str, save_etl: bool) -> None:
+        cpu = int(os.path.basename(etl_path)[4:-4])
+        self.record("report", cpu)
+
+        with self.condition:
+            # the last CPU has no next run
+            if self.condition.wait_for(lambda: len(self.runs) > self.runs[cpu] + 1, timeout=1):
+                self.overlapped.add(cpu)
+
+        super().generate_report(etl_path, report_path, save_etl)
+
+
+def test_report_is_generated_while_the_next_cpu_is_benchmarked(tmp_path) -> None:
+    config = ConfigParser(delimiters="=")
+    config.read(CONFIG_PATH)
+    config.set("settings", "benchmark_duration", "2")
+    config.set("settings", "cache_duration", "0")
+    config.set("xperf", "enabled", "true")
+    config.set("xperf", "save_etls", "false")
+
+    session_directory = str(tmp_path)
+    os.makedirs(os.path.join(session_directory, "CSVs"))
+    os.makedirs(os.path.join(session_directory, "xperf"))
+
+    backend = XperfStandIn()
+    cpus = [0, 1, 2]
+    benchmark = Benchmark(config, backend, PostProcessor())
+    run_session(config, benchmark, session_directory, cpus, [(len(cpus), 2)])
+
+    # the reports of every CPU but the last were generated while the next CPU was being benchmarked
+    assert backend.overlapped == {0, 1}
+
+    for cpu in cpus:
+        # the processes of a CPU are killed before the trace is stopped and its report is queued so that killing
+        # the processes can never terminate a report
+        assert backend.events.index(("kill processes", cpu)) < backend.events.index(("stop trace", cpu))
+
+        report_path = os.path.join(session_directory, "xperf", f"CPU-{cpu}.txt")
+        assert summarize_report(report_path)["dpc_time"] > 0
+        assert not os.path.exists(os.path.join(session_directory, "xperf", f"CPU-{cpu}.etl"))
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from dpcisr import parse_report, summarize_report, total_time  # noqa: E402
+
+# excerpt of a report generated by xperf -a dpcisr where empty buckets are omitted
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "dpcisr_report.txt")
+
+
+def test_total_time_uses_the_lower_bound_of_each_bucket() -> None:
+    # the bucket between 2 and 1000 usecs is empty, so the last bucket must not be assumed to start at 1 usec
+    assert total_time({(0, 1): 1000, (1000, 2000): 1}) == pytest.approx(2.0)
+
+
+def test_parse_report() -> None:
+    report = parse_report(FIXTURE_PATH)
+
+    assert report["dpc"]["count"] == 2283 + 412
+    assert set(report["dpc"]["modules"]) == {"ndis.sys", "dxgkrnl.sys"}
+    assert report["dpc"]["modules"]["dxgkrnl.sys"]["histogram"] == {(0, 1): 400, (16, 32): 12}
+    assert report["dpc"]["histogram"][(0, 1)] == 216 + 400
+    assert report["isr"]["modules"]["nvlddmkm.sys"]["histogram"] == {(0, 1): 1000, (1, 2): 499, (500, 1000): 1}
+
+
+def test_summarize_report() -> None:
+    summary = summarize_report(FIXTURE_PATH)
+
+    dpc_time = 0.5 * (216 + 400) + 1.5 * 854 + 3 * 1164 + 6 * 48 + 1500 * 1 + 24 * 12
+    isr_time = 0.5 * 1000 + 1.5 * 499 + 750 * 1
+
+    assert summary["dpc_count"] == 2695
+    assert summary["dpc_time"] == pytest.approx(dpc_time / 1000)
+    assert summary["dpc_latency99"] == 8
+    assert summary["isr_count"] == 1500
+    assert summary["isr_time"] == pytest.approx(isr_time / 1000)
+    assert summary["isr_latency99"] == 2
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from readiness import wait_until  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 50.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_ready_immediately() -> None:
+    clock = FakeClock()
+
+    assert wait_until(lambda: True, timeout=5, clock=clock) == 0
+    assert clock.sleeps == []
+
+
+def test_returns_the_time_waited() -> None:
+    clock = FakeClock()
+    polls = iter([False, False, False, True])
+
+    assert wait_until(lambda: next(polls), timeout=5, interval=0.5, clock=clock) == 1.5
+    assert clock.sleeps == [0.5, 0.5, 0.5]
+
+
+def test_timeout() -> None:
+    clock = FakeClock()
+    probes: list[float] = []
+
+    def probe() -> bool:
+        probes.append(clock.now)
+        return False
+
+    assert wait_until(probe, timeout=1, interval=0.4, clock=clock) is None
+
+    # the last sleep is shortened so that the timeout is not overshot and the probe is polled once more at the timeout
+    assert clock.sleeps == pytest.approx([0.4, 0.4, 0.2])
+    assert probes[-1] == pytest.approx(51.0)
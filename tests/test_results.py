@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from results import format_results  # noqa: E402
+
+GREEN = "\x1b[92m"
+
+RESULTS = {
+    "0": {"maximum": 400.0, "average": 300.0},
+    "1": {"maximum": 500.0, "average": 350.0},
+}
+
+
+def test_single_search_finalist_is_highlighted() -> None:
+    formatted = format_results(RESULTS, {}, True, candidates=["1"])
+
+    assert all(value.startswith(GREEN) for value in formatted["1"].values())
+    assert not any(GREEN in value for value in formatted["0"].values())
+
+
+def test_single_cpu_without_search_is_not_highlighted() -> None:
+    formatted = format_results({"0": RESULTS["0"]}, {}, True)
+
+    assert not any(GREEN in value for value in formatted["0"].values())
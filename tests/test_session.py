@@ -0,0 +1,46 @@
+import os
+import sys
+from configparser import ConfigParser
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from session import SessionError, validate_config  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity", "config.ini")
+
+
+def read_config(options: dict[str, str]) -> ConfigParser:
+    # options are keyed by "section.option"
+    config = ConfigParser(delimiters="=")
+    config.read(CONFIG_PATH)
+
+    for key, value in options.items():
+        section, option = key.split(".")
+        config.set(section, option, value)
+
+    return config
+
+
+def test_default_config_is_valid() -> None:
+    validate_config(read_config({}))
+
+
+@pytest.mark.parametrize(
+    ("options", "message"),
+    [
+        ({"settings.cache_duration": "-1"}, "invalid durations specified"),
+        ({"settings.benchmark_duration": "0"}, "invalid durations specified"),
+        ({"early stop.enabled": "true", "early stop.tolerance": "0"}, "invalid early stop settings specified"),
+        ({"early stop.enabled": "true", "early stop.metrics": "unknown"}, "invalid early stop settings specified"),
+        ({"search.enabled": "true", "search.eta": "1"}, "invalid search settings specified"),
+        ({"search.enabled": "true", "search.metric": "unknown"}, "invalid search settings specified"),
+        ({"rounds.count": "0"}, "invalid rounds settings specified"),
+        ({"rounds.order": "unknown"}, "invalid rounds settings specified"),
+        ({"search.enabled": "true", "rounds.count": "2"}, "multiple rounds can not be combined with search"),
+    ],
+)
+def test_invalid_config(options: dict[str, str], message: str) -> None:
+    with pytest.raises(SessionError, match=message):
+        validate_config(read_config(options))
@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from session_trace import PhaseTracer, measured_capture_overhead, trace_path  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_phase_is_recorded_as_a_complete_event() -> None:
+    clock = FakeClock()
+    tracer = PhaseTracer(clock)
+
+    clock.now += 1.5
+    with tracer.phase("launch subject", cpu=3):
+        clock.now += 0.25
+
+    assert tracer.events == [
+        {"name": "launch subject", "ph": "X", "ts": 1.5e6, "dur": 0.25e6, "pid": 1, "tid": 0, "args": {"cpu": 3}},
+    ]
+
+
+def test_phase_is_recorded_when_it_raises() -> None:
+    clock = FakeClock()
+    tracer = PhaseTracer(clock)
+
+    with pytest.raises(RuntimeError), tracer.phase("capture"):
+        clock.now += 2
+        raise RuntimeError
+
+    assert tracer.summary() == {"capture": (1, 2.0)}
+
+
+def test_each_thread_has_its_own_track() -> None:
+    tracer = PhaseTracer(FakeClock())
+
+    with tracer.phase("capture"):
+        pass
+
+    def generate_report() -> None:
+        with tracer.phase("generate report"):
+            pass
+
+    thread = threading.Thread(target=generate_report)
+    thread.start()
+    thread.join()
+
+    with tracer.phase("capture"):
+        pass
+
+    assert [event["tid"] for event in tracer.events] == [0, 1, 0]
+
+
+def test_summary_in_order_of_first_occurrence() -> None:
+    clock = FakeClock()
+    tracer = PhaseTracer(clock)
+
+    for name, duration in (("restart driver", 3), ("capture", 10), ("restart driver", 1)):
+        with tracer.phase(name):
+            clock.now += duration
+
+    assert list(tracer.summary().items()) == [("restart driver", (2, 4.0)), ("capture", (1, 10.0))]
+
+
+def test_write_non_ascii_names_and_path(tmp_path) -> None:
+    clock = FakeClock()
+    tracer = PhaseTracer(clock)
+
+    with tracer.phase("launch subject", subject="ゲーム Ünïcode.exe", path="C:\\Spiele\\Café\\游戏.exe"):
+        clock.now += 1
+
+    session_directory = tmp_path / "sessión 测试"
+    session_directory.mkdir()
+    path = trace_path(str(session_directory))
+    tracer.write(path)
+
+    # the trace is valid JSON that round-trips the names regardless of the encoding of the system
+    with open(path, encoding="utf-8") as file:
+        trace = json.load(file)
+
+    assert trace["displayTimeUnit"] == "ms"
+    assert trace["traceEvents"][0]["args"] == {"subject": "ゲーム Ünïcode.exe", "path": "C:\\Spiele\\Café\\游戏.exe"}
+
+
+def test_trace_path_of_resumed_session(tmp_path) -> None:
+    assert trace_path(str(tmp_path)) == os.path.join(tmp_path, "trace.json")
+
+    (tmp_path / "trace.json").touch()
+    assert trace_path(str(tmp_path)) == os.path.join(tmp_path, "trace-resume-1.json")
+
+    (tmp_path / "trace-resume-1.json").touch()
+    assert trace_path(str(tmp_path)) == os.path.join(tmp_path, "trace-resume-2.json")
+
+
+def test_measured_capture_overhead(tmp_path) -> None:
+    assert measured_capture_overhead(str(tmp_path)) is None
+
+    events = [
+        {"name": "restart driver", "dur": 4e6, "tid": 0, "args": {"cpu": 0}},
+        {"name": "cache", "dur": 20e6, "tid": 0, "args": {"cpu": 0}},
+        {"name": "capture", "dur": 30e6, "tid": 0, "args": {"cpu": 0}},
+        {"name": "restart driver", "dur": 2e6, "tid": 0, "args": {"cpu": 1}},
+        {"name": "capture", "dur": 30e6, "tid": 0, "args": {"cpu": 1}},
+        # background work overlaps with the next capture
+        {"name": "generate report", "dur": 50e6, "tid": 1, "args": {"cpu": 0}},
+    ]
+
+    for name, content in (("session 1", json.dumps({"traceEvents": events})), ("session 2", "{")):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "trace.json").write_text(content, encoding="utf-8")
+
+    assert measured_capture_overhead(str(tmp_path)) == pytest.approx(3.0)
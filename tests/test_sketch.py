@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from compute_frametimes import compute_metrics  # noqa: E402
+from sketch import FrametimeSketch  # noqa: E402
+from synthetic import GENERATORS  # noqa: E402
+
+# the sketch must agree with the exact engine, max, avg, min and stdev exactly and every percentile and % low within
+# the documented relative error of a / (1 - a)
+
+EXACT_METRICS = ("maximum", "average", "minimum", "stdev", "duration")
+
+
+def assert_within_bound(approximate: dict[str, float], exact: dict[str, float], relative_accuracy: float) -> None:
+    # small margin for floating point rounding
+    bound = relative_accuracy / (1 - relative_accuracy) * (1 + 1e-9)
+
+    assert approximate.keys() == exact.keys()
+
+    for metric, value in exact.items():
+        if metric in EXACT_METRICS:
+            assert approximate[metric] == pytest.approx(value, rel=1e-9), metric
+        else:
+            assert abs(approximate[metric] - value) <= bound * value, metric
+
+
+@pytest.mark.parametrize("relative_accuracy", [0.001, 0.01])
+@pytest.mark.parametrize("generator", GENERATORS)
+def test_sketch_matches_exact_metrics(generator: str, relative_accuracy: float) -> None:
+    frametimes = GENERATORS[generator](20000, seed=1)
+
+    sketch = FrametimeSketch(relative_accuracy)
+    sketch.update(frametimes)
+
+    assert_within_bound(sketch.metrics(), compute_metrics(frametimes), relative_accuracy)
+
+
+@pytest.mark.parametrize("generator", GENERATORS)
+def test_merged_chunk_sketches_match_exact_metrics(generator: str) -> None:
+    frametimes = GENERATORS[generator](20000, seed=2)
+    relative_accuracy = 0.001
+
+    # uneven chunks so that the merged sketches cover different bucket ranges
+    merged = FrametimeSketch(relative_accuracy)
+    for chunk in np.split(frametimes, [10, 4000, 4001, 15000]):
+        chunk_sketch = FrametimeSketch(relative_accuracy)
+        chunk_sketch.update(chunk)
+        merged.merge(chunk_sketch)
+
+    assert_within_bound(merged.metrics(), compute_metrics(frametimes), relative_accuracy)
+
+    # merging is equivalent to a single sketch of every frame
+    single = FrametimeSketch(relative_accuracy)
+    single.update(frametimes)
+
+    assert merged.offset == single.offset
+    assert np.array_equal(merged.counts, single.counts)
+
+
+def test_merge_rejects_different_accuracies() -> None:
+    with pytest.raises(ValueError):
+        FrametimeSketch(0.001).merge(FrametimeSketch(0.01))
@@ -0,0 +1,120 @@
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+from topology import LogicalCpu, parse_numa_nodes, parse_processor_information, representatives  # noqa: E402
+
+# SYSTEM_LOGICAL_PROCESSOR_INFORMATION_EX records packed as returned by GetLogicalProcessorInformationEx(RelationAll)
+
+
+def group_affinity(mask: int, group: int = 0) -> bytes:
+    # GROUP_AFFINITY: Mask, Group, Reserved[3]
+    return struct.pack("<QH6x", mask, group)
+
+
+def record(relationship: int, body: bytes) -> bytes:
+    return struct.pack("<II", relationship, 8 + len(body)) + body
+
+
+def processor_core(mask: int, group: int = 0, efficiency_class: int = 0) -> bytes:
+    # PROCESSOR_RELATIONSHIP: Flags, EfficiencyClass, Reserved[20], GroupCount, GroupMask[]
+    flags = 1 if bin(mask).count("1") > 1 else 0
+    return record(0, struct.pack("<BB20xH", flags, efficiency_class, 1) + group_affinity(mask, group))
+
+
+def cache(level: int, mask: int, group: int = 0) -> bytes:
+    # CACHE_RELATIONSHIP: Level, Associativity, LineSize, CacheSize, Type, Reserved[18], GroupCount, GroupMask[]
+    return record(2, struct.pack("<BBHII18xH", level, 8, 64, 32 << 20, 0, 1) + group_affinity(mask, group))
+
+
+def numa_node(node: int, masks: list[tuple[int, int]], group_count: int | None = None) -> bytes:
+    # NUMA_NODE_RELATIONSHIP: NodeNumber, Reserved[18], GroupCount, GroupMask[]
+    group_count = len(masks) if group_count is None else group_count
+    return record(
+        1,
+        struct.pack("<I18xH", node, group_count) + b"".join(group_affinity(mask, group) for group, mask in masks),
+    )
+
+
+def test_record_sizes_match_windows() -> None:
+    assert len(processor_core(0b11)) == 48
+    assert len(cache(3, 0xFF)) == 56
+    assert len(numa_node(0, [(0, 0xFF)])) == 48
+
+
+def test_smt_cores_with_two_cache_domains() -> None:
+    # 4 cores with SMT, each pair of cores shares an L3 (e.g. a CCX), records are interleaved as on Windows
+    data = b"".join(
+        [
+            processor_core(0b11),
+            cache(1, 0b11),
+            cache(2, 0b11),
+            processor_core(0b1100),
+            cache(1, 0b1100),
+            cache(2, 0b1100),
+            cache(3, 0b1111),
+            numa_node(0, [(0, 0xFF)]),
+            processor_core(0b110000),
+            cache(2, 0b110000),
+            processor_core(0b11000000),
+            cache(2, 0b11000000),
+            cache(3, 0b11110000),
+        ],
+    )
+
+    topology = parse_processor_information(data)
+
+    assert topology == [
+        LogicalCpu(0, 0, 0, 0),
+        LogicalCpu(1, 0, 0, 0),
+        LogicalCpu(2, 1, 0, 0),
+        LogicalCpu(3, 1, 0, 0),
+        LogicalCpu(4, 2, 4, 0),
+        LogicalCpu(5, 2, 4, 0),
+        LogicalCpu(6, 3, 4, 0),
+        LogicalCpu(7, 3, 4, 0),
+    ]
+    assert representatives(topology, "core") == [0, 2, 4, 6]
+    assert representatives(topology, "cache") == [0, 4]
+    assert representatives(topology, "cache", 2) == [0, 2, 4, 6]
+
+
+def test_hybrid_cores_and_processor_groups() -> None:
+    # P-cores with SMT have a higher efficiency class than E-cores, the E-cores are in the second processor group
+    data = b"".join(
+        [
+            processor_core(0b11, efficiency_class=1),
+            processor_core(0b1100, efficiency_class=1),
+            processor_core(0b1, group=1),
+            processor_core(0b10, group=1),
+            cache(3, 0b1111),
+            cache(3, 0b11, group=1),
+        ],
+    )
+
+    topology = parse_processor_information(data)
+
+    assert [(cpu.cpu, cpu.core, cpu.cache_domain, cpu.efficiency_class) for cpu in topology] == [
+        (0, 0, 0, 1),
+        (1, 0, 0, 1),
+        (2, 1, 0, 1),
+        (3, 1, 0, 1),
+        (64, 2, 64, 0),
+        (65, 3, 64, 0),
+    ]
+    assert representatives(topology, "cache") == [0, 64]
+
+
+def test_numa_nodes() -> None:
+    data = b"".join(
+        [
+            processor_core(0b11),
+            numa_node(0, [(0, 0xFF), (1, 0x0F)]),
+            # GroupCount is 0 before Windows Server 2022 which implies a single group
+            numa_node(1, [(0, 0xFF00)], group_count=0),
+        ],
+    )
+
+    assert parse_numa_nodes(data) == {0: [(0, 0xFF), (1, 0x0F)], 1: [(0, 0xFF00)]}